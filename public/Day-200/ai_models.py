@@ -1,17 +1,135 @@
 import os
+import time
 import logging
-import re
 import math
-from typing import Optional, List, Dict
-from collections import Counter
+import heapq
+import threading
+import multiprocessing
+from typing import Optional, List, Dict, Iterable, Iterator, Sequence, Tuple
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from document_store import ProcessedDocument
+from document_processor import POOL_START_METHOD
+from sentence_index import SentenceIndex
+from tokenizer import TokenizedDocument, WORD_PATTERN, SENTENCE_BOUNDARY_PATTERN
+from scoring import SentenceScorer, IncrementalScorer
+from answer_extractor import extract_specific_answer, question_type
+from content_cache import content_hash
+from corpus_index import CorpusIndex
+from query_cache import QueryCache, query_key
+from metrics import stage, timed, observe_stage
 
 logger = logging.getLogger(__name__)
 
+# Map-reduce summaries work on sections of whole paragraphs up to this size
+SECTION_CHARS = 256 * 1024
+
+# Best matching sentences kept per cached question
+QUERY_CANDIDATES = 3
+
+# Per-process models used by map-reduce pool workers
+_worker_models = None
+
+
+def split_sections(text: str, max_chars: int = SECTION_CHARS) -> List[str]:
+    """
+    Group paragraphs into sections of at most ``max_chars`` characters.
+    
+    Paragraphs are separated by the blank lines ``DocumentProcessor.clean_text``
+    inserts; a paragraph longer than a section is cut at sentence boundaries.
+    
+    Args:
+        text: Document text
+        max_chars: Target section size
+        
+    Returns:
+        Sections in document order
+    """
+    sections = []
+    current = []
+    size = 0
+    for paragraph in text.split('\n\n'):
+        separator = '\n\n'
+        for piece in _split_paragraph(paragraph, max_chars):
+            if current and size + len(separator) + len(piece) > max_chars:
+                sections.append(''.join(current))
+                current, size = [], 0
+            if current:
+                current.append(separator)
+                size += len(separator)
+            current.append(piece)
+            size += len(piece)
+            separator = ''  # later pieces continue the same paragraph
+    if current:
+        sections.append(''.join(current))
+    return sections
+
+
+def _split_paragraph(paragraph: str, max_chars: int) -> Iterator[str]:
+    """Cut an over-long paragraph after the last sentence boundary that fits."""
+    start = 0
+    cut = 0
+    for boundary in SENTENCE_BOUNDARY_PATTERN.finditer(paragraph):
+        if boundary.end() - start > max_chars and cut > start:
+            yield paragraph[start:cut]
+            start = cut
+        cut = boundary.end()
+    yield paragraph[start:]
+
+
+def _summarize_section(text: str, length: str, scoring: str, use_numpy: Optional[bool]) -> Optional[str]:
+    """Summarize one map-reduce section; runs inside pool worker processes."""
+    global _worker_models
+    if _worker_models is None:
+        _worker_models = AIModels(use_numpy=use_numpy)
+    return _worker_models.summarize_text(text, length, scoring)
+
+
+class DocumentBuilder:
+    """
+    Build a processed document from text chunks pushed one at a time.
+    
+    This is ``AIModels.prepare_document_stream`` for callers that need to
+    act on each chunk in between, e.g. to stream it on to a client.
+    """
+    
+    def __init__(self):
+        self.tokens = TokenizedDocument()
+        # Time tokenization only; the chunks may still be extracted lazily
+        self.tokenize_seconds = 0.0
+    
+    def feed(self, chunk: str):
+        """Tokenize the next chunk of text."""
+        start = time.perf_counter()
+        self.tokens.feed(chunk)
+        self.tokenize_seconds += time.perf_counter() - start
+    
+    def finish(self) -> ProcessedDocument:
+        """Tokenize the trailing text and index the document."""
+        start = time.perf_counter()
+        document = ProcessedDocument(self.tokens.finish())
+        observe_stage('tokenize', self.tokenize_seconds + time.perf_counter() - start)
+        return document
+
+
 class AIModels:
     """Handle AI model loading and inference for summarization and Q&A."""
     
-    def __init__(self):
-        """Initialize AI models."""
+    def __init__(self, use_numpy: Optional[bool] = None, workers: int = 1,
+                 query_cache: Optional[QueryCache] = None):
+        """
+        Initialize AI models.
+        
+        Args:
+            use_numpy: Score sentences with NumPy (True) or pure Python (False); defaults to NumPy when installed
+            workers: Worker processes for map-reduce summaries; 1 summarizes sections in-process
+            query_cache: Cache of ranked answer candidates for repeated questions, or None to rank every time
+        """
+        self.use_numpy = use_numpy
+        self.workers = max(1, workers)
+        self.query_cache = query_cache
+        self._process_pool = None
+        self._pool_lock = threading.Lock()  # held while the pool is created or shut down
         self.summarizer_available = True
         self.qa_available = True
         logger.info("Using lightweight text processing algorithms")
@@ -27,194 +145,508 @@ class AIModels:
             'will', 'would', 'could', 'should', 'may', 'might', 'must', 'can', 'shall'
         }
     
-    def _calculate_sentence_scores(self, sentences: List[str], word_freq: Dict[str, int]) -> List[float]:
-        """Calculate scores for sentences based on word frequencies."""
-        sentence_scores = []
+    def _clean_and_tokenize(self, text: str) -> List[str]:
+        """Clean and tokenize text."""
+        return WORD_PATTERN.findall(text)
+    
+    @timed('tokenize')
+    def prepare_document(self, text: str) -> ProcessedDocument:
+        """
+        Split and tokenize a document once so it can be summarized and queried repeatedly.
         
-        for sentence in sentences:
-            words = self._clean_and_tokenize(sentence.lower())
-            if len(words) == 0:
-                sentence_scores.append(0)
-                continue
-                
-            score = sum(word_freq.get(word, 0) for word in words if word not in self.stop_words)
-            # Normalize by sentence length
-            sentence_scores.append(score / len(words))
+        Args:
+            text: Full document text
             
-        return sentence_scores
+        Returns:
+            Processed document holding sentence offsets, token ids and term counts
+        """
+        return ProcessedDocument(TokenizedDocument(text))
     
-    def _clean_and_tokenize(self, text: str) -> List[str]:
-        """Clean and tokenize text."""
-        # Remove special characters and normalize
-        text = re.sub(r'[^\w\s]', ' ', text)
-        text = re.sub(r'\s+', ' ', text)
-        return [word.strip() for word in text.split() if word.strip()]
+    def prepare_document_stream(self, chunks: Iterable[str]) -> Optional[ProcessedDocument]:
+        """
+        Tokenize a document chunk by chunk as it is extracted.
+        
+        Sentence offsets, token ids and term counts are updated per chunk, so
+        the extractor never has to build the full text up front.
+        
+        Args:
+            chunks: Text chunks, e.g. from ``DocumentProcessor.iter_text``
+            
+        Returns:
+            Processed document, or None if extraction or tokenization fails
+        """
+        try:
+            builder = DocumentBuilder()
+            for chunk in chunks:
+                builder.feed(chunk)
+            return builder.finish()
+        except Exception as e:
+            logger.error(f"Error processing document stream: {str(e)}")
+            return None
     
-    def summarize_text(self, text: str, length: str = "medium") -> Optional[str]:
+    def append_to_document(self, document: ProcessedDocument, text: str) -> bool:
+        """
+        Append text to a processed document, e.g. a growing log or transcript.
+        
+        Only the new text and the sentence it continues are processed, and
+        frequency summaries of the document are kept up to date incrementally
+        from then on.
+        
+        Args:
+            document: Document returned by ``prepare_document``
+            text: Text to append
+            
+        Returns:
+            True if the document was updated, False if appending failed
+        """
+        try:
+            with document.lock:
+                if document.incremental_scorer is None:
+                    document.incremental_scorer = IncrementalScorer(document.tokens, document.index, self.stop_words)
+                document.append(text)
+            return True
+        except Exception as e:
+            logger.error(f"Error appending to document: {str(e)}")
+            return False
+    
+    def _scorer(self, document: ProcessedDocument, scoring: str = "frequency"):
+        """Return the document's sentence scorer, building it on first use."""
+        if scoring == "frequency" and document.incremental_scorer is not None:
+            return document.incremental_scorer
+        if document.scorer is None:
+            document.scorer = SentenceScorer(document.tokens, self.stop_words, self.use_numpy)
+        return document.scorer
+    
+    def summarize_text(self, text: str, length: str = "medium", scoring: str = "frequency") -> Optional[str]:
         """
         Generate a summary of the input text using extractive summarization.
         
         Args:
             text: Input text to summarize
             length: Summary length - 'short', 'medium', or 'long'
+            scoring: Sentence scoring - 'frequency', 'tfidf' or 'centroid'
             
         Returns:
             Generated summary or None if generation fails
         """
         try:
-            # Determine number of sentences based on length
-            if length == "short":
-                target_sentences = 2
-            elif length == "long":
-                target_sentences = 6
-            else:  # medium
-                target_sentences = 4
-            
-            # Split text into sentences
-            sentences = re.split(r'[.!?]+', text)
-            sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
-            
-            if len(sentences) <= target_sentences:
-                return " ".join(sentences) + "."
+            return self.summarize_document(self.prepare_document(text), length, scoring)
+        except Exception as e:
+            logger.error(f"Error generating summary: {str(e)}")
+            return None
+    
+    def summarize_document(self, document: ProcessedDocument, length: str = "medium",
+                           scoring: str = "frequency") -> Optional[str]:
+        """
+        Generate a summary of an already processed document.
+        
+        Args:
+            document: Document returned by ``prepare_document``
+            length: Summary length - 'short', 'medium', or 'long'
+            scoring: Sentence scoring - 'frequency', 'tfidf' or 'centroid'
             
-            # Calculate word frequencies
-            words = self._clean_and_tokenize(text.lower())
-            word_freq = Counter(word for word in words if word not in self.stop_words)
+        Returns:
+            Generated summary or None if generation fails
+        """
+        try:
+            with document.lock:
+                return self._summarize_tokens(document.tokens, length, self._scorer(document, scoring), scoring)
             
-            # Calculate sentence scores
-            sentence_scores = self._calculate_sentence_scores(sentences, word_freq)
+        except Exception as e:
+            logger.error(f"Error generating summary: {str(e)}")
+            return None
+    
+    def summarize_map_reduce(self, text: str, length: str = "medium", scoring: str = "frequency",
+                             section_chars: int = SECTION_CHARS) -> Optional[str]:
+        """
+        Summarize a very large text section by section.
+        
+        The text is split into sections of whole paragraphs, each section is
+        summarized on its own (on the process pool when ``workers`` > 1) and
+        the section summaries are summarized again until they fit in a
+        single section. Only a few sections are tokenized at any time, so
+        memory is bounded by the section size and the number of workers
+        rather than by the size of the text. Sentences are ranked against
+        their section, so the result can differ from ``summarize_text``.
+        
+        Args:
+            text: Input text to summarize
+            length: Summary length - 'short', 'medium', or 'long'
+            scoring: Sentence scoring - 'frequency', 'tfidf' or 'centroid'
+            section_chars: Target section size in characters
             
-            # Get top sentences
-            ranked_sentences = sorted(enumerate(sentence_scores), key=lambda x: x[1], reverse=True)
-            top_sentence_indices = sorted([idx for idx, score in ranked_sentences[:target_sentences]])
+        Returns:
+            Generated summary or None if generation fails
+        """
+        try:
+            for event in self.iter_map_reduce(text, length, scoring, section_chars):
+                if event['event'] == 'summary':
+                    return event['summary']
+        except Exception as e:
+            logger.error(f"Error generating map-reduce summary: {str(e)}")
+            return None
+    
+    def iter_map_reduce(self, text: str, length: str = "medium", scoring: str = "frequency",
+                        section_chars: int = SECTION_CHARS) -> Iterator[dict]:
+        """
+        Run ``summarize_map_reduce`` step by step, reporting each section as soon as it is summarized.
+        
+        Args:
+            text: Input text to summarize
+            length: Summary length - 'short', 'medium', or 'long'
+            scoring: Sentence scoring - 'frequency', 'tfidf' or 'centroid'
+            section_chars: Target section size in characters
             
-            # Construct summary
-            summary_sentences = [sentences[i] for i in top_sentence_indices]
-            summary = ". ".join(summary_sentences) + "."
+        Yields:
+            ``{'event': 'section', 'pass', 'section', 'sections', 'summary'}`` for every
+            section of every pass, then ``{'event': 'summary', 'summary'}`` with the result
+        """
+        sections = split_sections(text, section_chars)
+        reduce_pass = 1
+        while len(sections) > 1:
+            # Keep the longest summary of each section for the reduce pass
+            partial_summaries = []
+            for index, summary in enumerate(self._map_sections(sections, scoring)):
+                if summary:
+                    partial_summaries.append(summary)
+                yield {'event': 'section', 'pass': reduce_pass, 'section': index, 'sections': len(sections),
+                       'summary': summary}
+            reduced = "\n\n".join(partial_summaries)
+            if len(reduced) >= len(text):
+                break  # sections of a few huge sentences cannot shrink further
+            text = reduced
+            sections = split_sections(text, section_chars)
+            reduce_pass += 1
+        
+        yield {'event': 'summary', 'summary': self.summarize_text(text, length, scoring)}
+    
+    def _map_sections(self, sections: List[str], scoring: str) -> Iterator[Optional[str]]:
+        """Summarize sections in order, keeping at most two per worker in flight."""
+        if self.workers == 1:
+            for section in sections:
+                yield self.summarize_text(section, "long", scoring)
+            return
+        
+        pool = self._get_process_pool()
+        pending = deque()
+        try:
+            for section in sections:
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft().result()
+                pending.append(pool.submit(_summarize_section, section, "long", scoring, self.use_numpy))
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+    
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Return the map-reduce worker pool, starting it on first use."""
+        with self._pool_lock:
+            if self._process_pool is None:
+                # Started like the extraction pool; see POOL_START_METHOD
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(POOL_START_METHOD))
+            return self._process_pool
+    
+    def close(self):
+        """Shut down the map-reduce worker pool."""
+        with self._pool_lock:
+            pool, self._process_pool = self._process_pool, None
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+    
+    def summarize_document_sentences(self, document: ProcessedDocument, length: str = "medium",
+                                     scoring: str = "frequency") -> Optional[Tuple[str, List[Tuple[int, str]]]]:
+        """
+        Summarize a processed document, also returning the sentences it is made of.
+        
+        The document's content key is read under the same lock as the
+        summary is computed, so a summary can be cached under the key of
+        the text it was made from even while the document grows.
+        
+        Args:
+            document: Document returned by ``prepare_document``
+            length: Summary length - 'short', 'medium', or 'long'
+            scoring: Sentence scoring - 'frequency', 'tfidf' or 'centroid'
             
-            return summary
+        Returns:
+            Tuple of (summary, [(sentence id, sentence), ...] in document order, content key),
+            or None if generation fails
+        """
+        try:
+            with document.lock:
+                tokens = document.tokens
+                sentence_ids = self._summary_sentence_ids(tokens, length, self._scorer(document, scoring), scoring)
+                summary = self._join_summary(tokens, sentence_ids)
+                if sentence_ids is None:
+                    sentence_ids = range(tokens.sentence_count)
+                sentences = [(sentence_id, tokens.sentence(sentence_id)) for sentence_id in sentence_ids]
+                return summary, sentences, document.content_key
             
         except Exception as e:
             logger.error(f"Error generating summary: {str(e)}")
             return None
     
-    def answer_question(self, question: str, context: str) -> Optional[str]:
+    def _summarize_tokens(self, tokens: TokenizedDocument, length: str, scorer: SentenceScorer,
+                          scoring: str = "frequency") -> str:
+        """Build an extractive summary from tokenized sentences."""
+        return self._join_summary(tokens, self._summary_sentence_ids(tokens, length, scorer, scoring))
+    
+    @staticmethod
+    def _join_summary(tokens: TokenizedDocument, sentence_ids: Optional[Sequence[int]]) -> str:
+        """Join the chosen sentences into a summary; None keeps the whole document."""
+        if sentence_ids is None:
+            return " ".join(tokens.sentences()) + "."
+        
+        # Construct summary
+        summary_sentences = [tokens.sentence(i) for i in sentence_ids]
+        summary = ". ".join(summary_sentences) + "."
+        
+        return summary
+    
+    @staticmethod
+    def _target_sentences(length: str) -> int:
+        """Number of summary sentences for a summary length."""
+        # Determine number of sentences based on length
+        if length == "short":
+            return 2
+        elif length == "long":
+            return 6
+        else:  # medium
+            return 4
+    
+    def _summary_sentence_ids(self, tokens: TokenizedDocument, length: str, scorer: SentenceScorer,
+                              scoring: str = "frequency") -> Optional[List[int]]:
+        """Ids of the best sentences in document order, or None when the whole document fits in the summary."""
+        target_sentences = self._target_sentences(length)
+        
+        if tokens.sentence_count <= target_sentences:
+            return None
+        
+        # Score sentences and pick the top ones
+        with stage('score'):
+            return scorer.top_k(target_sentences, scoring)
+    
+    def answer_question(self, question: str, context: str, scoring: str = "keyword") -> Optional[str]:
         """
         Answer a question based on the provided context using keyword matching.
         
+        The context is used once, so only the question's keywords are
+        indexed rather than every term. With a query cache, a repeated
+        question is answered from the cached candidates without tokenizing
+        the context again.
+        
         Args:
             question: Question to answer
             context: Context text to search for answers
+            scoring: Sentence ranking - 'keyword' or 'bm25'
             
         Returns:
             Answer or None if generation fails
         """
         try:
-            # Extract keywords from question
-            question_words = self._clean_and_tokenize(question.lower())
-            question_keywords = [word for word in question_words if word not in self.stop_words and len(word) > 2]
+            question_keywords = self._question_keywords(question)
             
             if not question_keywords:
                 return "I couldn't understand your question. Please try rephrasing it."
             
-            # Split context into sentences
-            sentences = re.split(r'[.!?]+', context)
-            sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
-            
-            # Score sentences based on keyword matches
-            sentence_scores = []
-            for sentence in sentences:
-                sentence_words = self._clean_and_tokenize(sentence.lower())
-                
-                # Count keyword matches
-                matches = sum(1 for keyword in question_keywords if keyword in sentence_words)
-                
-                # Bonus for exact phrase matches
-                sentence_lower = sentence.lower()
-                phrase_matches = sum(1 for keyword in question_keywords if keyword in sentence_lower)
-                
-                # Calculate score
-                score = matches + (phrase_matches * 0.5)
-                sentence_scores.append((sentence, score))
-            
-            # Sort by score and get the best match
-            sentence_scores.sort(key=lambda x: x[1], reverse=True)
-            
-            if sentence_scores and sentence_scores[0][1] > 0:
-                best_sentence = sentence_scores[0][0]
-                
-                # Try to extract a more specific answer from the sentence
-                # Look for patterns based on question type
-                answer = self._extract_specific_answer(question, best_sentence, question_keywords)
-                return answer if answer else best_sentence + "."
-            else:
-                return "I couldn't find an answer to your question in the document. Try asking about topics that are mentioned in the text."
+            def rank():
+                document = self.prepare_document(context)
+                keyword_ids = [document.tokens.term_id(keyword) for keyword in question_keywords]
+                index = SentenceIndex(document.tokens, [term for term in keyword_ids if term is not None])
+                return self._rank_sentences(question_keywords, document, scoring, index)
             
+            key = self._query_key(f"{content_hash(context)}:{len(context)}", question, question_keywords, scoring)
+            candidates = self._cached_candidates(key, rank)
+            return self._answer_from_candidates(question, candidates, question_keywords)
         except Exception as e:
             logger.error(f"Error answering question: {str(e)}")
             return None
     
-    def _extract_specific_answer(self, question: str, sentence: str, keywords: List[str]) -> Optional[str]:
-        """Extract a specific answer from a sentence based on question type."""
-        question_lower = question.lower()
+    def answer_from_document(self, question: str, document: ProcessedDocument,
+                             scoring: str = "keyword") -> Optional[str]:
+        """
+        Answer a question against an already processed document.
+        
+        Only sentences that share a keyword with the question are scored,
+        using the document's inverted index. With a query cache, questions
+        that reduce to the same keywords and question type reuse one ranking.
+        
+        Args:
+            question: Question to answer
+            document: Document returned by ``prepare_document``
+            scoring: Sentence ranking - 'keyword' or 'bm25'
+            
+        Returns:
+            Answer or None if generation fails
+        """
+        try:
+            question_keywords = self._question_keywords(question)
+            
+            if not question_keywords:
+                return "I couldn't understand your question. Please try rephrasing it."
+            
+            with document.lock:
+                # Keyed by the current text, so an append starts a new entry
+                key = self._query_key(document.content_key, question, question_keywords, scoring)
+                candidates = self._cached_candidates(
+                    key, lambda: self._rank_sentences(question_keywords, document, scoring))
+            
+            return self._answer_from_candidates(question, candidates, question_keywords)
+            
+        except Exception as e:
+            logger.error(f"Error answering question: {str(e)}")
+            return None
+    
+    def _query_key(self, context_key: str, question: str, question_keywords: List[str],
+                   scoring: str) -> Optional[tuple]:
+        """Query cache key of a question, or None when caching is off."""
+        if self.query_cache is None:
+            return None
+        return query_key(context_key, question_keywords, question_type(question), scoring)
+    
+    def _cached_candidates(self, key: Optional[tuple], rank) -> Tuple[str, ...]:
+        """Return cached candidates for ``key``, ranking and caching them on a miss."""
+        if key is None:
+            return rank()
+        candidates = self.query_cache.get(key)
+        if candidates is None:
+            candidates = rank()
+            self.query_cache.put(key, candidates)
+        return candidates
+    
+    def _rank_sentences(self, question_keywords: List[str], document: ProcessedDocument,
+                        scoring: str, index: Optional[SentenceIndex] = None) -> Tuple[str, ...]:
+        """
+        Best matching sentences, best first; the caller must hold the document lock.
+        
+        ``index`` replaces the document's own index, e.g. one of the question's keywords only.
+        """
+        index = index or document.index
+        with stage('score'):
+            if scoring == "bm25":
+                keyword_ids = [document.tokens.term_id(keyword) for keyword in question_keywords]
+                sentence_scores = index.bm25_scores(keyword_ids)
+            else:
+                sentence_scores = self._keyword_scores(question_keywords, document, index)
+            
+            # Highest score wins; ties go to the earliest sentence
+            best_ids = heapq.nsmallest(QUERY_CANDIDATES,
+                                       (sid for sid, score in sentence_scores.items() if score > 0),
+                                       key=lambda sid: (-sentence_scores[sid], sid))
+            return tuple(document.sentence(sid) for sid in best_ids)
+    
+    def _answer_from_candidates(self, question: str, candidates: Sequence[str],
+                                question_keywords: List[str]) -> str:
+        """Extract the answer to a question from its best candidate sentence."""
+        if candidates:
+            # Try to extract a more specific answer from the sentence
+            # Look for patterns based on question type
+            answer = self._extract_specific_answer(question, candidates[0], question_keywords)
+            return answer if answer else candidates[0] + "."
+        return "I couldn't find an answer to your question in the document. Try asking about topics that are mentioned in the text."
+    
+    def answer_from_corpus(self, question: str, corpus: CorpusIndex, scoring: str = "keyword",
+                           answers: int = 3, candidates: int = 50) -> Optional[dict]:
+        """
+        Answer a question across every document in a corpus index.
+        
+        The index retrieves the best ``candidates`` sentences by bm25; with
+        keyword scoring they are re-ranked by the same whole-word and
+        substring matches ``answer_from_document`` uses. A specific answer
+        is then extracted from each of the top ``answers`` sentences.
+        
+        Args:
+            question: Question to answer
+            corpus: Index of the documents to search
+            scoring: Sentence ranking - 'keyword' or 'bm25'
+            answers: Number of sentences to return answers from
+            candidates: Number of sentences to retrieve from the index
+            
+        Returns:
+            Dictionary with the best 'answer' and its 'sources', or None if answering fails
+        """
+        try:
+            question_keywords = self._question_keywords(question)
+            
+            if not question_keywords:
+                return {'answer': "I couldn't understand your question. Please try rephrasing it.", 'sources': []}
+            
+            with stage('retrieve'):
+                hits = corpus.search(question_keywords, max(candidates, answers))
+            
+            if scoring != "bm25":
+                with stage('score'):
+                    # Stable sort, so ties keep their bm25 order
+                    hits.sort(key=lambda hit: -self._keyword_score(question_keywords, hit.sentence))
+            
+            sources = []
+            for hit in hits[:answers]:
+                answer = self._extract_specific_answer(question, hit.sentence, question_keywords)
+                sources.append({
+                    'document_id': hit.document_id,
+                    'filename': hit.filename,
+                    'sentence_id': hit.sentence_id,
+                    'sentence': hit.sentence,
+                    'answer': answer if answer else hit.sentence + "."
+                })
+            
+            if not sources:
+                return {'answer': "I couldn't find an answer to your question in the corpus. "
+                                  "Try asking about topics that are mentioned in the documents.",
+                        'sources': []}
+            return {'answer': sources[0]['answer'], 'sources': sources}
+            
+        except Exception as e:
+            logger.error(f"Error answering question from corpus: {str(e)}")
+            return None
+    
+    def _question_keywords(self, question: str) -> List[str]:
+        """Keywords of a question: words of three or more letters that are not stop words."""
+        question_words = self._clean_and_tokenize(question.lower())
+        return [word for word in question_words if word not in self.stop_words and len(word) > 2]
+    
+    def _keyword_score(self, keywords: List[str], sentence: str) -> float:
+        """Score one sentence as ``_keyword_scores`` does: whole-word matches plus half a point per substring match."""
         sentence_lower = sentence.lower()
+        words = set(self._clean_and_tokenize(sentence_lower))
+        return sum(1 for keyword in keywords if keyword in words) + 0.5 * sum(1 for keyword in keywords if keyword in sentence_lower)
+    
+    def _keyword_scores(self, keywords: List[str], document: ProcessedDocument,
+                        index: SentenceIndex) -> Dict[int, float]:
+        """Score sentences by whole-word keyword matches plus a bonus for substring matches."""
+        keyword_ids = [document.tokens.term_id(keyword) for keyword in keywords]
+        candidates = index.candidates(keyword_id for keyword_id in keyword_ids if keyword_id is not None)
+        
+        if not candidates:
+            # No sentence contains a keyword as a whole word; fall back to
+            # substring matches (e.g. plurals), materializing one sentence at
+            # a time. Sentences without a match cannot win, so they are left out.
+            sentence_scores = {}
+            for sentence_id in range(document.sentence_count):
+                sentence_lower = document.sentence(sentence_id).lower()
+                phrase_matches = sum(1 for keyword in keywords if keyword in sentence_lower)
+                if phrase_matches:
+                    sentence_scores[sentence_id] = 0.5 * phrase_matches
+            return sentence_scores
         
-        # What questions - look for definitions or explanations
-        if question_lower.startswith(('what', 'what is', 'what are')):
-            # Look for patterns like "X is Y" or "X are Y"
-            for keyword in keywords:
-                pattern = rf'{keyword}\s+(?:is|are|was|were)\s+([^.!?]*)'
-                match = re.search(pattern, sentence_lower)
-                if match:
-                    return match.group(1).strip()
-        
-        # When questions - look for dates or time references
-        elif question_lower.startswith(('when', 'what time', 'what date')):
-            # Look for date patterns
-            date_patterns = [
-                r'\b\d{4}\b',  # Years
-                r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
-                r'\b\d{1,2}/\d{1,2}/\d{2,4}\b',
-                r'\b(?:yesterday|today|tomorrow|last\s+\w+|next\s+\w+)\b'
-            ]
-            for pattern in date_patterns:
-                match = re.search(pattern, sentence, re.IGNORECASE)
-                if match:
-                    return match.group(0)
-        
-        # Where questions - look for locations
-        elif question_lower.startswith(('where', 'in which', 'at which')):
-            # Look for location indicators
-            location_patterns = [
-                r'\bin\s+([A-Z][a-zA-Z\s]*(?:City|State|Country|University|College|Hospital|School))\b',
-                r'\bat\s+([A-Z][a-zA-Z\s]*(?:University|College|Hospital|School|Center))\b',
-                r'\bin\s+([A-Z][a-zA-Z\s]*)\b'
-            ]
-            for pattern in location_patterns:
-                match = re.search(pattern, sentence)
-                if match:
-                    return match.group(1).strip()
-        
-        # Who questions - look for people or organizations
-        elif question_lower.startswith(('who', 'which person', 'which people')):
-            # Look for name patterns (capitalized words)
-            name_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b'
-            matches = re.findall(name_pattern, sentence)
-            if matches:
-                return ", ".join(matches[:3])  # Return up to 3 names
-        
-        # How many/much questions - look for numbers
-        elif any(phrase in question_lower for phrase in ['how many', 'how much', 'how long']):
-            number_patterns = [
-                r'\b\d+(?:,\d{3})*(?:\.\d+)?\s*(?:percent|%|million|billion|thousand|hundred)?\b',
-                r'\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred|thousand|million|billion)\b'
-            ]
-            for pattern in number_patterns:
-                match = re.search(pattern, sentence, re.IGNORECASE)
-                if match:
-                    return match.group(0)
-        
-        return None
+        sentence_scores = {}
+        for sentence_id, matched_ids in candidates.items():
+            # Count keyword matches
+            matches = sum(1 for keyword_id in keyword_ids if keyword_id in matched_ids)
+            
+            # Bonus for exact phrase matches
+            sentence_lower = document.sentence(sentence_id).lower()
+            phrase_matches = sum(1 for keyword in keywords if keyword in sentence_lower)
+            
+            sentence_scores[sentence_id] = matches + (phrase_matches * 0.5)
+        return sentence_scores
+    
+    @timed('answer_extract')
+    def _extract_specific_answer(self, question: str, sentence: str, keywords: List[str]) -> Optional[str]:
+        """Extract a specific answer from a sentence based on question type."""
+        return extract_specific_answer(question, sentence, keywords)
     
     def is_available(self) -> dict:
         """
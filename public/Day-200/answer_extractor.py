@@ -0,0 +1,130 @@
+import re
+from functools import lru_cache
+from typing import Optional, List, Pattern
+
+# Patterns are compiled once at import and shared by every question; only
+# the definition pattern depends on the question and is cached per keyword.
+DATE_PATTERNS = [
+    re.compile(r'\b\d{4}\b', re.IGNORECASE),  # Years
+    re.compile(r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b', re.IGNORECASE),
+    re.compile(r'\b\d{1,2}/\d{1,2}/\d{2,4}\b', re.IGNORECASE),
+    re.compile(r'\b(?:yesterday|today|tomorrow|last\s+\w+|next\s+\w+)\b', re.IGNORECASE)
+]
+
+LOCATION_PATTERNS = [
+    re.compile(r'\bin\s+([A-Z][a-zA-Z\s]*(?:City|State|Country|University|College|Hospital|School))\b'),
+    re.compile(r'\bat\s+([A-Z][a-zA-Z\s]*(?:University|College|Hospital|School|Center))\b'),
+    re.compile(r'\bin\s+([A-Z][a-zA-Z\s]*)\b')
+]
+
+NAME_PATTERN = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b')
+
+NUMBER_PATTERNS = [
+    re.compile(r'\b\d+(?:,\d{3})*(?:\.\d+)?\s*(?:percent|%|million|billion|thousand|hundred)?\b', re.IGNORECASE),
+    re.compile(r'\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred|thousand|million|billion)\b', re.IGNORECASE)
+]
+
+
+@lru_cache(maxsize=4096)
+def _definition_pattern(keyword: str) -> Pattern:
+    """Compiled "<keyword> is/are/was/were <answer>" pattern, cached per keyword."""
+    return re.compile(rf'{re.escape(keyword)}\s+(?:is|are|was|were)\s+([^.!?]*)')
+
+
+def _extract_definition(question_lower: str, sentence: str, keywords: List[str]) -> Optional[str]:
+    """What questions - look for patterns like "X is Y" or "X are Y"."""
+    sentence_lower = sentence.lower()
+    for keyword in keywords:
+        # Every pattern starts with its keyword, so a substring test rules
+        # out most keywords without running the regex at all
+        if keyword in sentence_lower:
+            match = _definition_pattern(keyword).search(sentence_lower)
+            if match:
+                return match.group(1).strip()
+    return None
+
+
+def _extract_date(question_lower: str, sentence: str, keywords: List[str]) -> Optional[str]:
+    """When questions - look for dates or time references."""
+    for pattern in DATE_PATTERNS:
+        match = pattern.search(sentence)
+        if match:
+            return match.group(0)
+    return None
+
+
+def _extract_location(question_lower: str, sentence: str, keywords: List[str]) -> Optional[str]:
+    """Where questions - look for location indicators."""
+    for pattern in LOCATION_PATTERNS:
+        match = pattern.search(sentence)
+        if match:
+            return match.group(1).strip()
+    return None
+
+
+def _extract_names(question_lower: str, sentence: str, keywords: List[str]) -> Optional[str]:
+    """Who questions - look for capitalized names of people or organizations."""
+    matches = NAME_PATTERN.findall(sentence)
+    if matches:
+        return ", ".join(matches[:3])  # Return up to 3 names
+    return None
+
+
+def _extract_number(question_lower: str, sentence: str, keywords: List[str]) -> Optional[str]:
+    """How many/much questions - look for numbers."""
+    for pattern in NUMBER_PATTERNS:
+        match = pattern.search(sentence)
+        if match:
+            return match.group(0)
+    return None
+
+
+def _contains_any(question_lower: str, phrases: tuple) -> bool:
+    return any(phrase in question_lower for phrase in phrases)
+
+
+# Question-type dispatch table of (type, test, phrases, extractor); the first
+# row whose test passes decides the type, even when its extractor then finds nothing.
+QUESTION_TYPES = [
+    ('what', str.startswith, ('what', 'what is', 'what are'), _extract_definition),
+    ('when', str.startswith, ('when', 'what time', 'what date'), _extract_date),
+    ('where', str.startswith, ('where', 'in which', 'at which'), _extract_location),
+    ('who', str.startswith, ('who', 'which person', 'which people'), _extract_names),
+    ('quantity', _contains_any, ('how many', 'how much', 'how long'), _extract_number),
+]
+
+
+def question_type(question: str) -> Optional[str]:
+    """
+    Classify a question by the kind of answer it expects.
+
+    Args:
+        question: Question text
+
+    Returns:
+        'what', 'when', 'where', 'who', 'quantity', or None for other questions
+    """
+    question_lower = question.lower()
+    for name, test, phrases, _ in QUESTION_TYPES:
+        if test(question_lower, phrases):
+            return name
+    return None
+
+
+def extract_specific_answer(question: str, sentence: str, keywords: List[str]) -> Optional[str]:
+    """
+    Extract a specific answer from a sentence based on question type.
+
+    Args:
+        question: Question text
+        sentence: Best matching sentence
+        keywords: Question keywords, in question order
+
+    Returns:
+        The extracted answer, or None if nothing specific was found
+    """
+    question_lower = question.lower()
+    for _, test, phrases, extract in QUESTION_TYPES:
+        if test(question_lower, phrases):
+            return extract(question_lower, sentence, keywords)
+    return None
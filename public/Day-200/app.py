@@ -1,14 +1,31 @@
 import os
+import re
+import json
+import time
+import queue
+import cProfile
 import logging
-from flask import Flask, render_template, request, jsonify, flash
+import threading
+from collections import Counter, OrderedDict
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, render_template, request, jsonify, flash, Response, g
 from werkzeug.utils import secure_filename
 from werkzeug.middleware.proxy_fix import ProxyFix
 import traceback
 from document_processor import DocumentProcessor
-from ai_models import AIModels
+from ai_models import AIModels, DocumentBuilder
+from document_store import DocumentStore
+from scoring import SCORING_METHODS
+from content_cache import ContentCache, content_hash
+from corpus_index import CorpusIndex
+from dedup import NearDuplicateFilter
+from query_cache import QueryCache
+from jobs import JobQueue, QueueFullError
+import metrics
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
+# Configure logging; LOG_LEVEL takes a level name such as DEBUG or WARNING
+logging.basicConfig(level=os.environ.get("LOG_LEVEL", "INFO").upper())
 logger = logging.getLogger(__name__)
 
 # Create Flask app
@@ -18,21 +35,635 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure upload settings
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
-app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['UPLOAD_FOLDER'] = 'uploads'  # only used to spool PDFs split across extraction processes
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'docx'}
+QA_SCORING_MODES = {'keyword', 'bm25'}
+SUMMARY_STRATEGIES = {'global', 'map_reduce'}
+
+# Configure text extraction: worker processes for large PDFs and a
+# per-document time limit in seconds (0 disables the limit) on time spent
+# extracting, checked between pages in-process and enforced by killing the
+# workers on the PDF pool
+app.config['EXTRACTION_WORKERS'] = int(os.environ.get("EXTRACTION_WORKERS", 1))
+app.config['EXTRACTION_TIMEOUT'] = float(os.environ.get("EXTRACTION_TIMEOUT", 0))
+
+# Configure map-reduce summaries of very large texts: worker processes and
+# the section size in characters
+app.config['SUMMARY_WORKERS'] = int(os.environ.get("SUMMARY_WORKERS", 1))
+app.config['SUMMARY_SECTION_CHARS'] = int(os.environ.get("SUMMARY_SECTION_CHARS", 256 * 1024))
+
+# Configure the server-side document store
+app.config['DOCUMENT_STORE_MAX_DOCUMENTS'] = int(os.environ.get("DOCUMENT_STORE_MAX_DOCUMENTS", 64))
+app.config['DOCUMENT_STORE_MAX_BYTES'] = int(os.environ.get("DOCUMENT_STORE_MAX_BYTES", 256 * 1024 * 1024))
+app.config['DOCUMENT_STORE_TTL'] = int(os.environ.get("DOCUMENT_STORE_TTL", 3600))  # seconds
+
+# Configure the content-addressed extraction and summary caches; set
+# CACHE_DISK_PATH to an sqlite file to add a persistent tier
+app.config['CACHE_MAX_ITEMS'] = int(os.environ.get("CACHE_MAX_ITEMS", 256))
+app.config['CACHE_MAX_BYTES'] = int(os.environ.get("CACHE_MAX_BYTES", 64 * 1024 * 1024))
+app.config['CACHE_DISK_PATH'] = os.environ.get("CACHE_DISK_PATH") or None
+app.config['CACHE_DISK_MAX_BYTES'] = int(os.environ.get("CACHE_DISK_MAX_BYTES", 512 * 1024 * 1024))
+
+# Configure the in-memory cache of ranked answers for repeated questions;
+# set QUERY_CACHE_MAX_ITEMS to 0 to disable it
+app.config['QUERY_CACHE_MAX_ITEMS'] = int(os.environ.get("QUERY_CACHE_MAX_ITEMS", 4096))
+app.config['QUERY_CACHE_MAX_BYTES'] = int(os.environ.get("QUERY_CACHE_MAX_BYTES", 16 * 1024 * 1024))
+
+# Configure the persistent corpus index searched by /corpus/ask; set
+# CORPUS_INDEX_DIR to a directory to index every uploaded document
+app.config['CORPUS_INDEX_DIR'] = os.environ.get("CORPUS_INDEX_DIR") or None
+app.config['CORPUS_INDEX_SHARDS'] = int(os.environ.get("CORPUS_INDEX_SHARDS", 4))
+app.config['CORPUS_CANDIDATES'] = int(os.environ.get("CORPUS_CANDIDATES", 50))  # sentences re-ranked per question
+app.config['CORPUS_MAX_ANSWERS'] = int(os.environ.get("CORPUS_MAX_ANSWERS", 10))
+
+# Configure background jobs for async uploads and summaries
+app.config['JOB_WORKERS'] = int(os.environ.get("JOB_WORKERS", 2))
+app.config['JOB_MAX_DEPTH'] = int(os.environ.get("JOB_MAX_DEPTH", 16))  # queued + running
+app.config['JOB_TTL'] = int(os.environ.get("JOB_TTL", 3600))  # seconds results are kept
+app.config['JOB_MAX_FINISHED'] = int(os.environ.get("JOB_MAX_FINISHED", 256))  # results kept at most
+app.config['JOB_RETRY_AFTER'] = int(os.environ.get("JOB_RETRY_AFTER", 5))  # seconds, sent with 429
+
+# Configure near-duplicate removal during extraction (off by default; set
+# DEDUP_ENABLED=1 to turn it on): lines and sentences whose estimated
+# similarity to an earlier one in the same upload reaches DEDUP_THRESHOLD
+# are dropped before tokenizing. Repeated lines in tables and logs count
+# as duplicates too, so enable it only for paged, boilerplate-heavy uploads.
+app.config['DEDUP_ENABLED'] = os.environ.get("DEDUP_ENABLED", "0") == "1"
+app.config['DEDUP_THRESHOLD'] = float(os.environ.get("DEDUP_THRESHOLD", 0.8))
+
+# Configure streaming responses: characters per text event when a cached
+# upload is streamed back
+app.config['STREAM_TEXT_CHARS'] = int(os.environ.get("STREAM_TEXT_CHARS", 64 * 1024))
+
+# Configure the batch endpoints
+app.config['BATCH_WORKERS'] = int(os.environ.get("BATCH_WORKERS", 4))
+app.config['BATCH_MAX_ITEMS'] = int(os.environ.get("BATCH_MAX_ITEMS", 1000))
+
+# Configure instrumentation: stage and request latency metrics served at
+# /metrics, and cProfile dumps written to PROFILE_DIR for requests that
+# send the profile header (profiling stays off while PROFILE_DIR is unset)
+app.config['METRICS_ENABLED'] = os.environ.get("METRICS_ENABLED", "1") != "0"
+app.config['PROFILE_DIR'] = os.environ.get("PROFILE_DIR") or None
+app.config['PROFILE_HEADER'] = os.environ.get("PROFILE_HEADER", "X-Profile")
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
 # Initialize processors
-document_processor = DocumentProcessor()
-ai_models = AIModels()
+document_processor = DocumentProcessor(
+    workers=app.config['EXTRACTION_WORKERS'],
+    timeout=app.config['EXTRACTION_TIMEOUT'] or None,
+    spool_dir=app.config['UPLOAD_FOLDER']
+)
+query_cache = None
+if app.config['QUERY_CACHE_MAX_ITEMS'] > 0:
+    query_cache = QueryCache(max_items=app.config['QUERY_CACHE_MAX_ITEMS'],
+                             max_bytes=app.config['QUERY_CACHE_MAX_BYTES'])
+ai_models = AIModels(workers=app.config['SUMMARY_WORKERS'], query_cache=query_cache)
+document_store = DocumentStore(
+    max_documents=app.config['DOCUMENT_STORE_MAX_DOCUMENTS'],
+    max_bytes=app.config['DOCUMENT_STORE_MAX_BYTES'],
+    ttl_seconds=app.config['DOCUMENT_STORE_TTL']
+)
+cache_settings = dict(
+    max_items=app.config['CACHE_MAX_ITEMS'],
+    max_bytes=app.config['CACHE_MAX_BYTES'],
+    disk_path=app.config['CACHE_DISK_PATH'],
+    disk_max_bytes=app.config['CACHE_DISK_MAX_BYTES']
+)
+extraction_cache = ContentCache('text', **cache_settings)  # file bytes -> extracted text
+summary_cache = ContentCache('summary', **cache_settings)  # (text hash, options) -> summary
+corpus_index = None
+if app.config['CORPUS_INDEX_DIR']:
+    corpus_index = CorpusIndex(app.config['CORPUS_INDEX_DIR'], shards=app.config['CORPUS_INDEX_SHARDS'])
+batch_executor = ThreadPoolExecutor(max_workers=app.config['BATCH_WORKERS'], thread_name_prefix="batch")
+job_queue = JobQueue(
+    workers=app.config['JOB_WORKERS'],
+    max_depth=app.config['JOB_MAX_DEPTH'],
+    ttl_seconds=app.config['JOB_TTL'],
+    max_finished=app.config['JOB_MAX_FINISHED']
+)
+
+dedup_totals = Counter()  # NearDuplicateFilter stats summed over uploads
+dedup_lock = threading.Lock()
+
+metrics.set_enabled(app.config['METRICS_ENABLED'])
+if app.config['PROFILE_DIR']:
+    os.makedirs(app.config['PROFILE_DIR'], exist_ok=True)
+
+def reopen_after_fork():
+    """
+    Reset per-process resources in a worker forked from a preloaded app.
+    
+    sqlite connections cannot be shared between processes, so each worker
+    opens its own; everything else is created lazily or is safe to inherit.
+    """
+    extraction_cache.reopen()
+    summary_cache.reopen()
+    if corpus_index is not None:
+        corpus_index.reopen()
+
+def collect_app_metrics():
+    """Yield cache, job queue and document store samples for /metrics."""
+    caches = [('text', extraction_cache), ('summary', summary_cache)]
+    if query_cache is not None:
+        caches.append(('query', query_cache))
+    for name, cache in caches:
+        stats = cache.stats()
+        hits = stats['memory_hits'] + stats.get('disk_hits', 0)
+        lookups = hits + stats['misses']
+        yield 'cache_hits_total', 'counter', 'Cache hits by tier', {'cache': name, 'tier': 'memory'}, stats['memory_hits']
+        if 'disk_hits' in stats:
+            yield 'cache_hits_total', 'counter', 'Cache hits by tier', {'cache': name, 'tier': 'disk'}, stats['disk_hits']
+        if 'evictions' in stats:
+            yield 'cache_evictions_total', 'counter', 'Entries evicted from the memory tier', {'cache': name}, stats['evictions']
+        yield 'cache_misses_total', 'counter', 'Cache misses', {'cache': name}, stats['misses']
+        yield 'cache_hit_ratio', 'gauge', 'Share of lookups served from either tier', {'cache': name}, hits / lookups if lookups else 0.0
+        yield 'cache_entries', 'gauge', 'Entries in the memory tier', {'cache': name}, stats['entries']
+        yield 'cache_bytes', 'gauge', 'Bytes held by the memory tier', {'cache': name}, stats['bytes']
+    
+    yield 'job_queue_depth', 'gauge', 'Queued plus running background jobs', {}, job_queue.depth()
+    store = document_store.stats()
+    yield 'document_store_documents', 'gauge', 'Documents in the document store', {}, store['documents']
+    yield 'document_store_bytes', 'gauge', 'Estimated bytes held by the document store', {}, store['bytes']
+    with dedup_lock:
+        totals = dict(dedup_totals)
+    yield 'dedup_sentences_total', 'counter', 'Sentences checked for near-duplicates', {}, totals.get('units', 0)
+    yield 'dedup_sentences_removed_total', 'counter', 'Near-duplicate sentences removed', {}, totals.get('units_removed', 0)
+    yield 'dedup_chars_total', 'counter', 'Extracted characters checked for near-duplicates', {}, totals.get('chars', 0)
+    yield 'dedup_chars_removed_total', 'counter', 'Characters removed as near-duplicates', {}, totals.get('chars_removed', 0)
+    if corpus_index is not None:
+        corpus = corpus_index.stats()
+        yield 'corpus_documents', 'gauge', 'Documents in the corpus index', {}, corpus['documents']
+        yield 'corpus_sentences', 'gauge', 'Sentences in the corpus index', {}, corpus['sentences']
+
+metrics.registry.register_collector(collect_app_metrics)
+
+@app.before_request
+def start_request_instrumentation():
+    """Start the request timer and, when asked for, the profiler."""
+    g.request_start = time.perf_counter()
+    if app.config['PROFILE_DIR'] and request.headers.get(app.config['PROFILE_HEADER']):
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            g.profiler = profiler
+        except ValueError as e:
+            # Only one profiler can run at a time on newer Pythons
+            logger.warning(f"Not profiling {request.path}: {str(e)}")
+
+@app.after_request
+def finish_request_instrumentation(response):
+    """Record request latency and write the profile of a profiled request."""
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.disable()
+        filename = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'unmatched'}-{os.getpid()}-{id(profiler):x}.prof"
+        profiler.dump_stats(os.path.join(app.config['PROFILE_DIR'], filename))
+        response.headers['X-Profile-Output'] = filename
+    
+    start = g.get('request_start')
+    if start is not None:
+        metrics.registry.observe('http_request_duration_seconds', time.perf_counter() - start,
+                                 'HTTP request latency until the response is returned',
+                                 endpoint=request.endpoint or 'unmatched', method=request.method,
+                                 status=str(response.status_code))
+    return response
 
 def allowed_file(filename):
     """Check if the file extension is allowed."""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def resolve_document(data, text_key):
+    """
+    Look up the document referenced by a request payload.
+    
+    Args:
+        data: Parsed JSON payload
+        text_key: Payload key that carries raw text when no document_id is sent
+        
+    Returns:
+        Tuple of (document, error response); exactly one of them is None
+    """
+    document_id = data.get('document_id')
+    if document_id:
+        if not isinstance(document_id, str):
+            return None, (jsonify({'error': 'document_id must be a string'}), 400)
+        document = document_store.get(document_id)
+        if document is None:
+            return None, (jsonify({'error': 'Document not found or expired. Please upload it again.'}), 404)
+        return document, None
+    
+    return ai_models.prepare_document(data[text_key]), None
+
+def track_progress(chunks, job):
+    """Pass extracted chunks through, recording how many have been seen on the job."""
+    for count, chunk in enumerate(chunks, 1):
+        job.update_progress(chunks_extracted=count)
+        yield chunk
+
+def duplicate_filter():
+    """Create a near-duplicate filter for one upload, or None when deduplication is off."""
+    if not app.config['DEDUP_ENABLED']:
+        return None
+    return NearDuplicateFilter(threshold=app.config['DEDUP_THRESHOLD'])
+
+def extract_document(data, extension, job=None, dedup=None):
+    """
+    Extract and tokenize an uploaded file.
+    
+    The upload is parsed straight from memory, where it already is. PDFs
+    with enough pages are still split across extraction worker processes,
+    as the document processor spools them itself when it needs a path.
+    
+    Args:
+        data: Raw file content
+        extension: File extension without the dot, used to detect the format
+        job: Background job to report extraction progress on, if any
+        dedup: Filter that removes near-duplicate lines and sentences, if any
+        
+    Returns:
+        Processed document, or None if extraction fails
+    """
+    with closing(document_processor.iter_text(data, f'upload.{extension}')) as chunks:
+        if job is not None:
+            job.update_progress(stage='extracting', chunks_extracted=0)
+            chunks = track_progress(chunks, job)
+        if dedup is not None:
+            chunks = dedup.filter(chunks, pages=extension == 'pdf')
+        return ai_models.prepare_document_stream(chunks)
+
+def process_upload(job, data, extension, filename):
+    """
+    Extract, tokenize and store an uploaded file.
+    
+    Args:
+        job: Background job to report progress on, or None when run inline
+        data: Raw file content
+        extension: File extension without the dot
+        filename: Sanitized original file name
+        
+    Returns:
+        Tuple of (response payload, HTTP status)
+    """
+    data_hash = content_hash(data)
+    file_key = f"{data_hash}:{extension}"
+    
+    dedup = None
+    cached_text = extraction_cache.get(file_key)
+    if cached_text is not None:
+        # Known document: skip extraction entirely; the cached text has
+        # already been deduplicated
+        document = ai_models.prepare_document(cached_text)
+    else:
+        # Extract and tokenize page by page, keeping the result server-side
+        # for follow-up calls
+        dedup = duplicate_filter()
+        document = extract_document(data, extension, job, dedup)
+        
+        if not document or len(document.text.strip()) < 10:
+            return {'error': 'Could not extract meaningful text from the document'}, 400
+        
+        extraction_cache.put(file_key, document.text)
+    
+    return store_upload(job, document, data_hash, filename, dedup), 200
+
+def process_upload_job(job, data, extension, filename):
+    """
+    Run ``process_upload`` as a background job.
+    
+    Job results stay in memory until they expire, so the extracted text is
+    left out; clients fetch what they need through the document_id.
+    """
+    payload, status = process_upload(job, data, extension, filename)
+    payload.pop('text', None)
+    return payload, status
+
+def store_upload(job, document, data_hash, filename, dedup=None):
+    """
+    Keep an extracted document for follow-up calls and add it to the corpus index.
+    
+    Args:
+        job: Background job to report progress on, or None
+        document: Processed document
+        data_hash: Content hash of the uploaded file
+        filename: Sanitized original file name
+        dedup: Near-duplicate filter the text was extracted through, if any
+        
+    Returns:
+        Upload response payload
+    """
+    document_id = document_store.put(document)
+    
+    payload = {
+        'success': True,
+        'document_id': document_id,
+        'text': document.text,
+        'stats': {
+            'word_count': document.word_count,
+            'char_count': document.char_count,
+            'filename': filename
+        }
+    }
+    
+    if dedup is not None:
+        payload['stats']['duplicates_removed'] = {
+            'sentences': dedup.stats['units_removed'],
+            'chars': dedup.stats['chars_removed']
+        }
+        with dedup_lock:
+            dedup_totals.update(dedup.stats)
+    
+    if corpus_index is not None:
+        if job is not None:
+            job.update_progress(stage='indexing')
+        # Keyed by file content, so uploading the same file again replaces it
+        with document.lock:
+            indexed = corpus_index.add(data_hash, filename,
+                                       (document.sentence(i) for i in range(document.sentence_count)))
+        if indexed:
+            payload['corpus_id'] = data_hash
+    
+    return payload
+
+def stream_upload(data, extension, filename):
+    """
+    Extract an uploaded file and stream its text as NDJSON events.
+    
+    A ``text`` event is written for every extracted chunk (a PDF page, a
+    DOCX paragraph or a slice of a text file) as soon as it is tokenized,
+    followed by a ``done`` event carrying the usual upload payload without
+    the text, or an ``error`` event.
+    
+    Args:
+        data: Raw file content
+        extension: File extension without the dot
+        filename: Sanitized original file name
+        
+    Returns:
+        Streaming NDJSON response
+    """
+    data_hash = content_hash(data)
+    file_key = f"{data_hash}:{extension}"
+    
+    def generate():
+        cached_text = extraction_cache.get(file_key)
+        if cached_text is not None:
+            step = app.config['STREAM_TEXT_CHARS']
+            chunks = (cached_text[start:start + step] for start in range(0, len(cached_text), step))
+        else:
+            chunks = document_processor.iter_text(data, f'upload.{extension}')
+        dedup = duplicate_filter() if cached_text is None else None
+        
+        builder = DocumentBuilder()
+        document = None
+        try:
+            with closing(chunks):
+                if dedup is not None:
+                    chunks = dedup.filter(chunks, pages=extension == 'pdf')
+                for index, chunk in enumerate(chunks):
+                    builder.feed(chunk)
+                    yield json.dumps({'event': 'text', 'index': index, 'text': chunk}) + '\n'
+            document = builder.finish()
+        except Exception as e:
+            logger.error(f"Error streaming upload {filename}: {str(e)}")
+        
+        if not document or len(document.text.strip()) < 10:
+            yield json.dumps({'event': 'error', 'status': 400,
+                              'error': 'Could not extract meaningful text from the document'}) + '\n'
+            return
+        if cached_text is None:
+            extraction_cache.put(file_key, document.text)
+        
+        payload = store_upload(None, document, data_hash, filename, dedup)
+        del payload['text']
+        yield json.dumps({'event': 'done', 'status': 200, **payload}) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def process_summary(job, document, summary_length, scoring, text=None):
+    """
+    Summarize a processed document, reusing cached summaries.
+    
+    Args:
+        job: Background job to report progress on, or None when run inline
+        document: Document to summarize, or None to tokenize ``text`` here
+        summary_length: 'short', 'medium' or 'long'
+        scoring: Sentence scoring method
+        text: Raw text to summarize when no document is given
+        
+    Returns:
+        Tuple of (response payload, HTTP status)
+    """
+    if document is None:
+        if job is not None:
+            job.update_progress(stage='tokenizing', chars=len(text))
+        document = ai_models.prepare_document(text)
+    
+    if job is not None:
+        job.update_progress(stage='summarizing', sentences=document.sentence_count)
+    
+    # Generate summary, reusing an earlier one for the same text and options
+    with document.lock:
+        content_key, original_words = document.content_key, document.word_count
+    summary = summary_cache.get(f"{content_key}:{summary_length}:{scoring}")
+    if summary is None:
+        result = ai_models.summarize_document_sentences(document, length=summary_length, scoring=scoring)
+        
+        if not result or not result[0]:
+            return {'error': 'Failed to generate summary'}, 500
+        
+        # Cached under the text it was made from, which an append may have changed
+        summary, _, content_key = result
+        summary_cache.put(f"{content_key}:{summary_length}:{scoring}", summary)
+    
+    return summary_response(summary, original_words), 200
+
+def process_map_reduce_summary(job, text, summary_length, scoring):
+    """
+    Summarize a large text section by section, reusing cached summaries.
+    
+    Args:
+        job: Background job to report progress on, or None when run inline
+        text: Text to summarize
+        summary_length: 'short', 'medium' or 'long'
+        scoring: Sentence scoring method
+        
+    Returns:
+        Tuple of (response payload, HTTP status)
+    """
+    if job is not None:
+        job.update_progress(stage='summarizing', chars=len(text))
+    
+    summary_key = f"{content_hash(text)}:{len(text)}:{summary_length}:{scoring}:map_reduce"
+    summary = summary_cache.get(summary_key)
+    if summary is None:
+        summary = ai_models.summarize_map_reduce(text, length=summary_length, scoring=scoring,
+                                                 section_chars=app.config['SUMMARY_SECTION_CHARS'])
+        
+        if not summary:
+            return {'error': 'Failed to generate summary'}, 500
+        
+        summary_cache.put(summary_key, summary)
+    
+    original_words = sum(1 for _ in re.finditer(r'\S+', text))
+    return summary_response(summary, original_words), 200
+
+def stream_summary(document, text, summary_length, scoring, strategy):
+    """
+    Summarize as server-sent events, sending each result as soon as it is scored.
+    
+    The map_reduce strategy sends a ``section`` event with the summary of
+    every section; the global strategy sends a ``sentence`` event for every
+    chosen sentence. Both end with a ``summary`` event carrying the usual
+    summary payload, or an ``error`` event. Cached summaries are sent
+    straight away as the ``summary`` event.
+    
+    Args:
+        document: Processed document, or None to tokenize ``text`` while streaming
+        text: Text of the document
+        summary_length: 'short', 'medium' or 'long'
+        scoring: Sentence scoring method
+        strategy: 'global' or 'map_reduce'
+        
+    Yields:
+        Formatted server-sent events
+    """
+    yield sse_event('progress', {'stage': 'summarizing', 'chars': len(text)})
+    try:
+        if strategy == 'map_reduce':
+            summary_key = f"{content_hash(text)}:{len(text)}:{summary_length}:{scoring}:map_reduce"
+            summary = summary_cache.get(summary_key)
+            if summary is None:
+                for step in ai_models.iter_map_reduce(text, length=summary_length, scoring=scoring,
+                                                      section_chars=app.config['SUMMARY_SECTION_CHARS']):
+                    if step['event'] == 'section':
+                        yield sse_event('section', {key: value for key, value in step.items() if key != 'event'})
+                    else:
+                        summary = step['summary']
+                if summary:
+                    summary_cache.put(summary_key, summary)
+            original_words = sum(1 for _ in re.finditer(r'\S+', text))
+        else:
+            if document is None:
+                document = ai_models.prepare_document(text)
+            with document.lock:
+                content_key, original_words = document.content_key, document.word_count
+            summary = summary_cache.get(f"{content_key}:{summary_length}:{scoring}")
+            if summary is None:
+                result = ai_models.summarize_document_sentences(document, length=summary_length, scoring=scoring)
+                if result:
+                    summary, sentences, content_key = result
+                    for sentence_id, sentence in sentences:
+                        yield sse_event('sentence', {'sentence_id': sentence_id, 'sentence': sentence})
+                    summary_cache.put(f"{content_key}:{summary_length}:{scoring}", summary)
+        
+        if not summary:
+            yield sse_event('error', {'error': 'Failed to generate summary', 'status': 500})
+            return
+        yield sse_event('summary', summary_response(summary, original_words))
+        
+    except Exception as e:
+        logger.error(f"Error streaming summary: {str(e)}")
+        logger.error(traceback.format_exc())
+        yield sse_event('error', {'error': f'Error generating summary: {str(e)}', 'status': 500})
+
+def summary_response(summary, original_words):
+    """Build the summary payload with its compression statistics."""
+    # Calculate compression ratio
+    summary_words = len(summary.split())
+    compression_ratio = round((1 - summary_words / original_words) * 100, 1)
+    
+    return {
+        'success': True,
+        'summary': summary,
+        'stats': {
+            'original_words': original_words,
+            'summary_words': summary_words,
+            'compression_ratio': compression_ratio
+        }
+    }
+
+def process_question(document, question, scoring):
+    """
+    Answer one question against a processed document.
+    
+    Args:
+        document: Document to search
+        question: Stripped, non-empty question
+        scoring: Sentence ranking, 'keyword' or 'bm25'
+        
+    Returns:
+        Tuple of (response payload, HTTP status)
+    """
+    if len(document.text.strip()) < 10:
+        return {'error': 'Context is too short to answer questions meaningfully'}, 400
+    
+    # Get answer from AI model
+    answer = ai_models.answer_from_document(question, document, scoring)
+    return question_response(question, answer)
+
+def process_context_question(context, question, scoring):
+    """Answer one question against raw context text, as ``process_question`` does."""
+    if not isinstance(context, str) or len(context.strip()) < 10:
+        return {'error': 'Context is too short to answer questions meaningfully'}, 400
+    
+    answer = ai_models.answer_question(question, context, scoring)
+    return question_response(question, answer)
+
+def question_response(question, answer):
+    """Build the answer payload and HTTP status."""
+    if not answer:
+        return {'error': 'Could not generate an answer to your question'}, 500
+    
+    return {
+        'success': True,
+        'answer': answer,
+        'question': question
+    }, 200
+
+def wants_async(values):
+    """Check whether a request asked to run as a background job."""
+    return request_flag(values, 'async')
+
+def wants_stream(values):
+    """Check whether a request asked for a streaming response."""
+    return request_flag(values, 'stream')
+
+def request_flag(values, name):
+    """Read a boolean option from the payload or form, falling back to the query string."""
+    value = (values or {}).get(name) or request.args.get(name, '')
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+def sse_event(event, payload):
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+def sse_response(events):
+    """Stream server-sent events, asking proxies not to buffer them."""
+    return Response(events, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+def submit_job(kind, fn, *args):
+    """Queue a background job and describe it, or refuse with 429 when the queue is full."""
+    try:
+        job = job_queue.submit(kind, fn, *args)
+    except QueueFullError as e:
+        response = jsonify({'error': f'Server is busy, please retry shortly. {str(e)}'})
+        response.headers['Retry-After'] = str(app.config['JOB_RETRY_AFTER'])
+        return response, 429
+    
+    return jsonify({
+        'success': True,
+        'job_id': job.id,
+        'status': job.status,
+        'status_url': f'/jobs/{job.id}',
+        'result_url': f'/jobs/{job.id}/result'
+    }), 202
+
 @app.route('/')
 def index():
     """Render the main page."""
@@ -52,33 +683,18 @@ def upload_file():
         if not allowed_file(file.filename):
             return jsonify({'error': 'File type not supported. Please upload PDF, TXT, or DOCX files.'}), 400
         
-        # Save the uploaded file
         filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(filepath)
+        extension = file.filename.rsplit('.', 1)[1].lower()
+        data = file.read()
         
-        # Extract text from the document
-        text = document_processor.extract_text(filepath)
+        if wants_async(request.form):
+            return submit_job('upload', process_upload_job, data, extension, filename)
         
-        if not text or len(text.strip()) < 10:
-            return jsonify({'error': 'Could not extract meaningful text from the document'}), 400
+        if wants_stream(request.form):
+            return stream_upload(data, extension, filename)
         
-        # Clean up the uploaded file
-        os.remove(filepath)
-        
-        # Calculate document stats
-        word_count = len(text.split())
-        char_count = len(text)
-        
-        return jsonify({
-            'success': True,
-            'text': text,
-            'stats': {
-                'word_count': word_count,
-                'char_count': char_count,
-                'filename': filename
-            }
-        })
+        payload, status = process_upload(None, data, extension, filename)
+        return jsonify(payload), status
         
     except Exception as e:
         logger.error(f"Error processing file upload: {str(e)}")
@@ -91,35 +707,59 @@ def summarize():
     try:
         data = request.get_json()
         
-        if not data or 'text' not in data:
+        if not isinstance(data, dict) or ('text' not in data and 'document_id' not in data):
             return jsonify({'error': 'No text provided for summarization'}), 400
         
-        text = data['text']
+        # Text to add to a stored document before summarizing, e.g. new
+        # lines of a growing transcript
+        appended = data.get('append')
+        if appended is not None and (not data.get('document_id') or not isinstance(appended, str)):
+            return jsonify({'error': 'append must be a string sent with a document_id'}), 400
+        
         summary_length = data.get('length', 'medium')  # short, medium, long
+        scoring = data.get('scoring', 'frequency')  # frequency, tfidf, centroid
+        strategy = data.get('strategy', 'global')  # global, map_reduce
+        
+        if scoring not in SCORING_METHODS:
+            return jsonify({'error': f'Unknown scoring mode: {scoring}'}), 400
+        if strategy not in SUMMARY_STRATEGIES:
+            return jsonify({'error': f'Unknown summary strategy: {strategy}'}), 400
+        
+        stream = wants_stream(data)
+        if not data.get('document_id'):
+            # Raw text is tokenized where it is summarized: in the job for
+            # async requests, after the first event for streams and section
+            # by section for map_reduce, so nothing heavy runs here first
+            document, text = None, data.get('text')
+            if not isinstance(text, str):
+                return jsonify({'error': 'text must be a string'}), 400
+        else:
+            document, error = resolve_document(data, 'text')
+            if error:
+                return error
+            
+            if appended:
+                if not ai_models.append_to_document(document, appended):
+                    return jsonify({'error': 'Failed to append text to the document'}), 500
+                document_store.resize(data['document_id'])
+            text = document.text
         
         if len(text.strip()) < 50:
             return jsonify({'error': 'Text is too short to summarize meaningfully'}), 400
         
-        # Generate summary
-        summary = ai_models.summarize_text(text, length=summary_length)
+        if stream:
+            return sse_response(stream_summary(document, text, summary_length, scoring, strategy))
         
-        if not summary:
-            return jsonify({'error': 'Failed to generate summary'}), 500
+        if strategy == 'map_reduce':
+            process, args = process_map_reduce_summary, (text, summary_length, scoring)
+        else:
+            process, args = process_summary, (document, summary_length, scoring, text if document is None else None)
         
-        # Calculate compression ratio
-        original_words = len(text.split())
-        summary_words = len(summary.split())
-        compression_ratio = round((1 - summary_words / original_words) * 100, 1)
+        if wants_async(data):
+            return submit_job('summarize', process, *args)
         
-        return jsonify({
-            'success': True,
-            'summary': summary,
-            'stats': {
-                'original_words': original_words,
-                'summary_words': summary_words,
-                'compression_ratio': compression_ratio
-            }
-        })
+        payload, status = process(None, *args)
+        return jsonify(payload), status
         
     except Exception as e:
         logger.error(f"Error generating summary: {str(e)}")
@@ -132,35 +772,290 @@ def ask_question():
     try:
         data = request.get_json()
         
-        if not data or 'question' not in data or 'context' not in data:
+        if not isinstance(data, dict) or 'question' not in data or ('context' not in data and 'document_id' not in data):
             return jsonify({'error': 'Question and context are required'}), 400
         
-        question = data['question'].strip()
-        context = data['context']
+        question = data['question'].strip() if isinstance(data['question'], str) else ''
+        scoring = data.get('scoring', 'keyword')  # keyword, bm25
         
         if not question:
             return jsonify({'error': 'Please provide a question'}), 400
         
-        if len(context.strip()) < 10:
-            return jsonify({'error': 'Context is too short to answer questions meaningfully'}), 400
+        if scoring not in QA_SCORING_MODES:
+            return jsonify({'error': f'Unknown scoring mode: {scoring}'}), 400
         
-        # Get answer from AI model
-        answer = ai_models.answer_question(question, context)
+        if not data.get('document_id'):
+            if not isinstance(data.get('context'), str):
+                return jsonify({'error': 'context must be a string'}), 400
+            # Answer raw context directly, so a repeated question can be
+            # served from the query cache without tokenizing the context
+            payload, status = process_context_question(data['context'], question, scoring)
+            return jsonify(payload), status
         
-        if not answer:
+        document, error = resolve_document(data, 'context')
+        if error:
+            return error
+        
+        payload, status = process_question(document, question, scoring)
+        return jsonify(payload), status
+        
+    except Exception as e:
+        logger.error(f"Error answering question: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'Error answering question: {str(e)}'}), 500
+
+@app.route('/corpus/ask', methods=['POST'])
+def ask_corpus():
+    """Answer a question across every document in the corpus index."""
+    try:
+        if corpus_index is None:
+            return jsonify({'error': 'Corpus search is not enabled on this server'}), 404
+        
+        data = request.get_json()
+        
+        if not isinstance(data, dict) or 'question' not in data:
+            return jsonify({'error': 'Question is required'}), 400
+        
+        question = data['question'].strip() if isinstance(data['question'], str) else ''
+        scoring = data.get('scoring', 'keyword')  # keyword, bm25
+        answers = data.get('answers', 3)
+        
+        if not question:
+            return jsonify({'error': 'Please provide a question'}), 400
+        
+        if scoring not in QA_SCORING_MODES:
+            return jsonify({'error': f'Unknown scoring mode: {scoring}'}), 400
+        
+        if not isinstance(answers, int) or not 1 <= answers <= app.config['CORPUS_MAX_ANSWERS']:
+            return jsonify({'error': f"answers must be between 1 and {app.config['CORPUS_MAX_ANSWERS']}"}), 400
+        
+        result = ai_models.answer_from_corpus(question, corpus_index, scoring, answers=answers,
+                                              candidates=app.config['CORPUS_CANDIDATES'])
+        
+        if not result:
             return jsonify({'error': 'Could not generate an answer to your question'}), 500
         
         return jsonify({
             'success': True,
-            'answer': answer,
-            'question': question
+            'answer': result['answer'],
+            'question': question,
+            'sources': result['sources']
         })
         
     except Exception as e:
-        logger.error(f"Error answering question: {str(e)}")
+        logger.error(f"Error answering corpus question: {str(e)}")
         logger.error(traceback.format_exc())
         return jsonify({'error': f'Error answering question: {str(e)}'}), 500
 
+@app.route('/corpus/documents/<corpus_id>', methods=['DELETE'])
+def delete_corpus_document(corpus_id):
+    """Remove a document from the corpus index."""
+    if corpus_index is None:
+        return jsonify({'error': 'Corpus search is not enabled on this server'}), 404
+    if not corpus_index.delete(corpus_id):
+        return jsonify({'error': 'Document not found in the corpus'}), 404
+    return jsonify({'success': True, 'corpus_id': corpus_id})
+
+@app.route('/summarize/batch', methods=['POST'])
+def summarize_batch():
+    """
+    Summarize many texts in one request, streaming one NDJSON line per item.
+    
+    Body: {"items": [{"text" | "document_id", "length", "scoring", "id"}, ...]}
+    with optional top-level "length" and "scoring" defaults.
+    """
+    try:
+        data = request.get_json()
+        items, error = batch_items(data)
+        if error:
+            return error
+        
+        default_length = data.get('length', 'medium')
+        default_scoring = data.get('scoring', 'frequency')
+        tasks = []
+        for index, item in enumerate(items):
+            scoring = item.get('scoring', default_scoring)
+            if scoring not in SCORING_METHODS:
+                tasks.append((index, item, None, f'Unknown scoring mode: {scoring}'))
+                continue
+            options = (item.get('length', default_length), scoring)
+            tasks.append((index, item, options, None))
+        
+        def summarize_item(document, options):
+            summary_length, scoring = options
+            if len(document.text.strip()) < 50:
+                return {'error': 'Text is too short to summarize meaningfully'}, 400
+            return process_summary(None, document, summary_length, scoring)
+        
+        return stream_batch(tasks, 'text', summarize_item)
+        
+    except Exception as e:
+        logger.error(f"Error in batch summary: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'Error generating summaries: {str(e)}'}), 500
+
+@app.route('/ask/batch', methods=['POST'])
+def ask_batch():
+    """
+    Answer many questions in one request, streaming one NDJSON line per question.
+    
+    Body: {"items": [{"context" | "document_id", "question" | "questions", "scoring", "id"}, ...]}
+    or a single {"context" | "document_id", "questions": [...]}; the context
+    of each distinct document is tokenized only once.
+    """
+    try:
+        data = request.get_json()
+        if isinstance(data, dict) and 'items' not in data and 'questions' in data:
+            data = {'items': [data]}
+        items, error = batch_items(data)
+        if error:
+            return error
+        
+        default_scoring = data.get('scoring', 'keyword')
+        tasks = []
+        for index, item in enumerate(items):
+            questions = item.get('questions', [item.get('question', '')])
+            scoring = item.get('scoring', default_scoring)
+            if not isinstance(questions, list):
+                tasks.append((index, item, None, '"questions" must be a list'))
+                continue
+            for position, question in enumerate(questions):
+                task_index = index if 'questions' not in item else [index, position]
+                question = question.strip() if isinstance(question, str) else ''
+                if not question:
+                    tasks.append((task_index, item, None, 'Please provide a question'))
+                elif scoring not in QA_SCORING_MODES:
+                    tasks.append((task_index, item, None, f'Unknown scoring mode: {scoring}'))
+                else:
+                    tasks.append((task_index, item, (question, scoring), None))
+        
+        if len(tasks) > app.config['BATCH_MAX_ITEMS']:
+            return jsonify({'error': f"Too many questions; the limit is {app.config['BATCH_MAX_ITEMS']}"}), 400
+        
+        def answer_item(document, options):
+            question, scoring = options
+            return process_question(document, question, scoring)
+        
+        return stream_batch(tasks, 'context', answer_item)
+        
+    except Exception as e:
+        logger.error(f"Error in batch Q&A: {str(e)}")
+        logger.error(traceback.format_exc())
+        return jsonify({'error': f'Error answering questions: {str(e)}'}), 500
+
+def batch_items(data):
+    """
+    Validate the items list of a batch request.
+    
+    Returns:
+        Tuple of (items, error response); exactly one of them is None
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('items'), list) or not data['items']:
+        return None, (jsonify({'error': 'A non-empty "items" list is required'}), 400)
+    if len(data['items']) > app.config['BATCH_MAX_ITEMS']:
+        return None, (jsonify({'error': f"Too many items; the limit is {app.config['BATCH_MAX_ITEMS']}"}), 400)
+    if not all(isinstance(item, dict) for item in data['items']):
+        return None, (jsonify({'error': 'Every item must be an object'}), 400)
+    return data['items'], None
+
+def stream_batch(tasks, text_key, handler):
+    """
+    Run batch tasks on the worker pool and stream their results as NDJSON.
+    
+    Tasks that reference the same document (by id or identical text) are
+    grouped so each distinct context is tokenized once, then the groups run
+    in parallel. Lines are written as soon as each task finishes, tagged
+    with the item index and any client-supplied "id".
+    
+    Args:
+        tasks: (index, item, options, error) tuples; tasks with an error are reported as-is
+        text_key: Item key holding raw text when no document_id is given
+        handler: Called as handler(document, options); returns (payload, HTTP status)
+    """
+    results = queue.Queue()
+    groups = OrderedDict()
+    
+    for index, item, options, error in tasks:
+        if error:
+            results.put((index, item, {'error': error}, 400))
+            continue
+        if item.get('document_id'):
+            if not isinstance(item['document_id'], str):
+                results.put((index, item, {'error': 'document_id must be a string'}, 400))
+                continue
+            key = ('id', item['document_id'])
+        elif isinstance(item.get(text_key), str):
+            key = ('text', content_hash(item[text_key]))
+        else:
+            results.put((index, item, {'error': f'Each item needs "{text_key}" or "document_id"'}, 400))
+            continue
+        groups.setdefault(key, []).append((index, item, options))
+    
+    def run_group(group):
+        first_item = group[0][1]
+        try:
+            if first_item.get('document_id'):
+                document = document_store.get(first_item['document_id'])
+                if document is None:
+                    for index, item, _ in group:
+                        results.put((index, item, {'error': 'Document not found or expired. Please upload it again.'}, 404))
+                    return
+            else:
+                document = ai_models.prepare_document(first_item[text_key])
+            
+            for index, item, options in group:
+                try:
+                    payload, status = handler(document, options)
+                except Exception as e:
+                    logger.error(f"Error in batch item {index}: {str(e)}")
+                    payload, status = {'error': str(e)}, 500
+                results.put((index, item, payload, status))
+        except Exception as e:
+            logger.error(f"Error preparing batch document: {str(e)}")
+            for index, item, _ in group:
+                results.put((index, item, {'error': str(e)}, 500))
+    
+    for group in groups.values():
+        batch_executor.submit(run_group, group)
+    
+    def generate():
+        for _ in range(len(tasks)):
+            index, item, payload, status = results.get()
+            line = {'index': index, 'status': status, **payload}
+            if 'id' in item:
+                line['id'] = item['id']
+            yield json.dumps(line) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Expose metrics in the Prometheus text format."""
+    return Response(metrics.registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@app.route('/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Report the status and progress of a background job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job.to_dict())
+
+@app.route('/jobs/<job_id>/result', methods=['GET'])
+def job_result(job_id):
+    """Return the payload of a finished background job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    
+    if job.status == 'failed':
+        return jsonify({'error': f'Job failed: {job.error}'}), 500
+    if job.status != 'done':
+        return jsonify(job.to_dict()), 202
+    
+    payload, status = job.result
+    return jsonify(payload), status
+
 @app.errorhandler(413)
 def too_large(e):
     """Handle file too large error."""
@@ -172,4 +1067,5 @@ def internal_error(e):
     return jsonify({'error': 'Internal server error. Please try again.'}), 500
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=True)
+    # Development server only; production runs under gunicorn with gunicorn.conf.py
+    app.run(host='0.0.0.0', port=int(os.environ.get("PORT", 5000)), debug=os.environ.get("FLASK_DEBUG") == "1")
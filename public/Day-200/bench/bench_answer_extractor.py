@@ -0,0 +1,122 @@
+"""
+Answers/sec of the compiled answer extractor versus the previous
+per-call regex construction in AIModels._extract_specific_answer.
+
+Both implementations run over the same generated question corpus and
+must return identical answers. Run from the Day-200 directory:
+
+    python bench/bench_answer_extractor.py --questions 20000
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from answer_extractor import extract_specific_answer  # noqa: E402
+
+SUBJECTS = ["contract", "deadline", "budget", "author", "project", "committee", "revenue", "office", "report"]
+QUESTION_TEMPLATES = [
+    "What is the {0} and the {1}?",
+    "What are the {0} {1} terms?",
+    "When is the {0} {1}?",
+    "Where is the {0} located?",
+    "Who wrote the {0}?",
+    "How many {0} items were in the {1}?",
+    "How much did the {0} cost?",
+    "Why was the {0} late?",
+]
+SENTENCE_TEMPLATES = [
+    "The {0} is due on March {2}, 2024 and the {1} was approved by John Smith",
+    "Our {1} was signed at Stanford University in {3} with {2} percent support",
+    "In Boston City the {0} are reviewed by Mary Jones and Ann Lee every {2} days",
+    "A {1} of {2},000 dollars was spent last week on the {0}",
+    "The {0} {1} were moved to the Central Hospital on 4/{2}/2023",
+]
+
+
+def legacy_extract(question, sentence, keywords):
+    """The previous AIModels._extract_specific_answer, which compiled patterns on every call."""
+    question_lower = question.lower()
+    sentence_lower = sentence.lower()
+    if question_lower.startswith(('what', 'what is', 'what are')):
+        for keyword in keywords:
+            pattern = rf'{keyword}\s+(?:is|are|was|were)\s+([^.!?]*)'
+            match = re.search(pattern, sentence_lower)
+            if match:
+                return match.group(1).strip()
+    elif question_lower.startswith(('when', 'what time', 'what date')):
+        date_patterns = [
+            r'\b\d{4}\b',
+            r'\b(?:January|February|March|April|May|June|July|August|September|October|November|December)\s+\d{1,2},?\s+\d{4}\b',
+            r'\b\d{1,2}/\d{1,2}/\d{2,4}\b',
+            r'\b(?:yesterday|today|tomorrow|last\s+\w+|next\s+\w+)\b'
+        ]
+        for pattern in date_patterns:
+            match = re.search(pattern, sentence, re.IGNORECASE)
+            if match:
+                return match.group(0)
+    elif question_lower.startswith(('where', 'in which', 'at which')):
+        location_patterns = [
+            r'\bin\s+([A-Z][a-zA-Z\s]*(?:City|State|Country|University|College|Hospital|School))\b',
+            r'\bat\s+([A-Z][a-zA-Z\s]*(?:University|College|Hospital|School|Center))\b',
+            r'\bin\s+([A-Z][a-zA-Z\s]*)\b'
+        ]
+        for pattern in location_patterns:
+            match = re.search(pattern, sentence)
+            if match:
+                return match.group(1).strip()
+    elif question_lower.startswith(('who', 'which person', 'which people')):
+        name_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*)\b'
+        matches = re.findall(name_pattern, sentence)
+        if matches:
+            return ", ".join(matches[:3])
+    elif any(phrase in question_lower for phrase in ['how many', 'how much', 'how long']):
+        number_patterns = [
+            r'\b\d+(?:,\d{3})*(?:\.\d+)?\s*(?:percent|%|million|billion|thousand|hundred)?\b',
+            r'\b(?:one|two|three|four|five|six|seven|eight|nine|ten|eleven|twelve|thirteen|fourteen|fifteen|sixteen|seventeen|eighteen|nineteen|twenty|thirty|forty|fifty|sixty|seventy|eighty|ninety|hundred|thousand|million|billion)\b'
+        ]
+        for pattern in number_patterns:
+            match = re.search(pattern, sentence, re.IGNORECASE)
+            if match:
+                return match.group(0)
+    return None
+
+
+def make_corpus(count, seed=11):
+    """Generate (question, sentence, keywords) triples."""
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(count):
+        first, second = rng.sample(SUBJECTS, 2)
+        question = rng.choice(QUESTION_TEMPLATES).format(first, second)
+        sentence = rng.choice(SENTENCE_TEMPLATES).format(first, second, rng.randint(1, 28), rng.randint(1990, 2030))
+        keywords = [w for w in re.findall(r'\w+', question.lower()) if len(w) > 3]
+        corpus.append((question, sentence, keywords))
+    return corpus
+
+
+def answers_per_second(extract, corpus):
+    start = time.perf_counter()
+    answers = [extract(question, sentence, keywords) for question, sentence, keywords in corpus]
+    return len(corpus) / (time.perf_counter() - start), answers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--questions", type=int, default=20000)
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.questions)
+    before, expected = answers_per_second(legacy_extract, corpus)
+    after, answers = answers_per_second(extract_specific_answer, corpus)
+    assert answers == expected, "compiled extractor changed an answer"
+    print(f"before: {before:10.0f} answers/s")
+    print(f" after: {after:10.0f} answers/s  ({after / before:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
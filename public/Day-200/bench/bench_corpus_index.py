@@ -0,0 +1,77 @@
+"""
+Indexing throughput and question latency of the sharded corpus index.
+
+Indexes ``--documents`` generated documents, one of which holds the
+needle sentence, then times AIModels.answer_from_corpus and a delete
+followed by a re-add of a single document. Run from the Day-200
+directory:
+
+    python bench/bench_corpus_index.py --documents 5000 --shards 4
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_models import AIModels  # noqa: E402
+from corpus_index import CorpusIndex  # noqa: E402
+from bench_qa_index import NEEDLE, QUESTIONS, make_vocabulary  # noqa: E402
+
+
+def make_sentences(rng, vocabulary, count):
+    return [" ".join(rng.choices(vocabulary, k=rng.randint(8, 20))).capitalize() for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=5000)
+    parser.add_argument("--sentences", type=int, default=40, help="sentences per document")
+    parser.add_argument("--shards", type=int, default=4)
+    parser.add_argument("--questions", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    vocabulary = make_vocabulary(rng)
+    models = AIModels()
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = CorpusIndex(directory, shards=args.shards)
+        start = time.perf_counter()
+        for number in range(args.documents):
+            sentences = make_sentences(rng, vocabulary, args.sentences)
+            if number == args.documents // 2:
+                sentences[len(sentences) // 2] = NEEDLE.rstrip(".")
+            corpus.add(f"doc-{number}", f"doc-{number}.txt", sentences)
+        elapsed = time.perf_counter() - start
+        stats = corpus.stats()
+        print(f"indexed {stats['documents']} documents, {stats['sentences']} sentences in {elapsed:.1f} s "
+              f"({stats['documents'] / elapsed:.0f} documents/s)")
+
+        for scoring in ("keyword", "bm25"):
+            latencies = []
+            for number in range(args.questions):
+                question = QUESTIONS[number % len(QUESTIONS)]
+                start = time.perf_counter()
+                result = models.answer_from_corpus(question, corpus, scoring)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            print(f"{scoring:>8}: p50 {statistics.median(latencies):.2f} ms, "
+                  f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.2f} ms -> {result['answer']!r}")
+
+        start = time.perf_counter()
+        corpus.delete(f"doc-{args.documents // 2}")
+        deleted = time.perf_counter() - start
+        start = time.perf_counter()
+        corpus.add(f"doc-{args.documents // 2}", "needle.txt", [NEEDLE.rstrip(".")])
+        added = time.perf_counter() - start
+        print(f"delete one document {deleted * 1000:.2f} ms, re-add {added * 1000:.2f} ms")
+        corpus.close()
+
+
+if __name__ == "__main__":
+    main()
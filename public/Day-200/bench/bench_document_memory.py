@@ -0,0 +1,66 @@
+"""
+Memory held by a processed document, measured with tracemalloc.
+
+Compares ProcessedDocument (one backing string, interned token ids in
+arrays, array-based postings) against the per-sentence string model the
+summarizer and Q&A used to build: stripped sentence strings, lowercase
+copies and token lists. The text itself is allocated before tracing
+starts, so only the memory added on top of it is counted. Run from the
+Day-200 directory:
+
+    python bench/bench_document_memory.py --mb 10
+"""
+import os
+import re
+import sys
+import argparse
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_models import AIModels  # noqa: E402
+from bench_qa_index import make_document  # noqa: E402
+
+
+def sentence_list_model(text):
+    """The previous representation: sentence strings plus lowercase and token copies."""
+    sentences = [s.strip() for s in re.split(r'[.!?]+', text) if len(s.strip()) > 10]
+    lowered = [s.lower() for s in sentences]
+    tokens = [re.findall(r'\w+', s) for s in lowered]
+    frequencies = Counter(word for words in tokens for word in words)
+    return sentences, lowered, tokens, frequencies
+
+
+def held_mb(build):
+    """Memory still held by the result of ``build()``, and the peak while building it, in MB."""
+    tracemalloc.start()
+    result = build()
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return held / (1024 * 1024), peak / (1024 * 1024)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=10)
+    args = parser.parse_args()
+
+    text = make_document(int(args.mb * 1024 * 1024))
+    text_mb = sys.getsizeof(text) / (1024 * 1024)
+    models = AIModels()
+
+    print(f"text: {text_mb:.1f} MB")
+    print(f"{'model':>18} {'held MB':>10} {'peak MB':>10} {'x text':>8}")
+    results = {}
+    for label, build in (("sentence lists", lambda: sentence_list_model(text)),
+                         ("ProcessedDocument", lambda: models.prepare_document(text))):
+        held, peak = held_mb(build)
+        results[label] = held
+        print(f"{label:>18} {held:>10.1f} {peak:>10.1f} {held / text_mb:>8.2f}")
+    print(f"reduction: {results['sentence lists'] / results['ProcessedDocument']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Cost of re-summarizing a growing document after each small append.
+
+Compares re-processing the whole text (the previous behaviour of
+/summarize) with AIModels.append_to_document, which only tokenizes the
+appended text and updates the frequency scores incrementally. Both must
+produce the same summary. Run from the Day-200 directory:
+
+    python bench/bench_incremental_summary.py --mb 5 --append-kb 2
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_models import AIModels  # noqa: E402
+from bench_qa_index import make_document  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=5, help="size of the document before appending")
+    parser.add_argument("--append-kb", type=float, default=2, help="size of each appended chunk")
+    parser.add_argument("--appends", type=int, default=10)
+    parser.add_argument("--length", default="medium", choices=["short", "medium", "long"])
+    args = parser.parse_args()
+
+    models = AIModels()
+    text = make_document(int(args.mb * 1024 * 1024))
+    chunk_source = make_document(int(args.append_kb * 1024 * (args.appends + 1)), seed=7)
+    chunk_size = int(args.append_kb * 1024)
+    chunks = [chunk_source[i * chunk_size:(i + 1) * chunk_size] for i in range(args.appends)]
+    rng = random.Random(0)
+    rng.shuffle(chunks)
+
+    document = models.prepare_document(text)
+    start = time.perf_counter()
+    models.append_to_document(document, "")
+    setup = time.perf_counter() - start
+
+    full_timings, incremental_timings = [], []
+    for chunk in chunks:
+        text += chunk
+
+        start = time.perf_counter()
+        expected = models.summarize_document(models.prepare_document(text), args.length)
+        full_timings.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        models.append_to_document(document, chunk)
+        summary = models.summarize_document(document, args.length)
+        incremental_timings.append(time.perf_counter() - start)
+
+        assert summary == expected, "incremental summary differs from a full re-summary"
+
+    full = statistics.median(full_timings)
+    incremental = statistics.median(incremental_timings)
+    print(f"document: {args.mb} MB, {document.sentence_count} sentences, {args.append_kb} KB appends")
+    print(f"incremental scorer setup (first append): {setup * 1000:10.1f} ms")
+    print(f"full re-summary per append:              {full * 1000:10.1f} ms")
+    print(f"incremental re-summary per append:       {incremental * 1000:10.1f} ms  ({full / incremental:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Wall time and peak memory of global versus map-reduce summarization.
+
+The global pass tokenizes and ranks every sentence of the text at once;
+the map-reduce pass summarizes sections of whole paragraphs and then the
+section summaries. Peak memory is traced in-process, so it is only
+reported for runs without worker processes; on a machine with a single
+CPU the pool runs cannot be faster than the in-process one. Run from the
+Day-200 directory:
+
+    python bench/bench_map_reduce.py --mb 16 --workers 1 4
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_models import AIModels  # noqa: E402
+from bench_qa_index import make_document  # noqa: E402
+
+
+def make_paragraphs(size_bytes, paragraph_bytes=4096):
+    """Generated text with a blank line every ``paragraph_bytes``, like clean_text output."""
+    text = make_document(size_bytes)
+    cuts = []
+    position = 0
+    while position < len(text):
+        end = text.find(". ", position + paragraph_bytes)
+        if end < 0:
+            break
+        cuts.append(text[position:end + 1])
+        position = end + 2
+    cuts.append(text[position:])
+    return "\n\n".join(cuts)
+
+
+def measure(fn, trace):
+    """Return (seconds, peak traced MB or None); memory is traced in a second, untimed run."""
+    start = time.perf_counter()
+    assert fn(), "summary failed"
+    elapsed = time.perf_counter() - start
+    if not trace:
+        return elapsed, None
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def report(label, elapsed, peak):
+    print(f"{label:>16} {elapsed:>10.2f} {f'{peak:.1f}' if peak is not None else '-':>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=16)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--section-kb", type=int, default=256)
+    parser.add_argument("--no-trace", action="store_true", help="skip the traced runs that measure peak memory")
+    args = parser.parse_args()
+
+    text = make_paragraphs(int(args.mb * 1024 * 1024))
+    print(f"text: {len(text) / (1024 * 1024):.1f} MB, {os.cpu_count()} CPUs")
+    print(f"{'mode':>16} {'seconds':>10} {'peak MB':>10}")
+
+    models = AIModels()
+    report("global", *measure(lambda: models.summarize_text(text), not args.no_trace))
+
+    for workers in args.workers:
+        models = AIModels(workers=workers)
+        try:
+            timing = measure(lambda: models.summarize_map_reduce(text, section_chars=args.section_kb * 1024),
+                             workers == 1 and not args.no_trace)
+        finally:
+            models.close()
+        report(f"map-reduce x{workers}", *timing)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+Per-call overhead of the stage timers with metrics enabled and disabled.
+
+Times AIModels.answer_from_document on a small document, which passes
+through the 'score' and 'answer_extract' timers on every call, plus the
+bare timer primitives. Run from the Day-200 directory:
+
+    python bench/bench_metrics_overhead.py --calls 20000
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import metrics  # noqa: E402
+from ai_models import AIModels  # noqa: E402
+
+TEXT = ("The audit committee met on March 3, 2025 to review the budget. "
+        "The budget for the hiring plan is 2 million dollars. ") * 20
+QUESTION = "What is the budget for the hiring plan?"
+
+
+def per_call_us(fn, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    models = AIModels()
+    document = models.prepare_document(TEXT)
+
+    def empty_stage():
+        with metrics.stage('bench'):
+            pass
+
+    print(f"{'':>24} {'disabled us':>12} {'enabled us':>12}")
+    for label, fn in (("answer_from_document", lambda: models.answer_from_document(QUESTION, document)),
+                      ("empty stage() block", empty_stage)):
+        timings = []
+        for enabled in (False, True):
+            metrics.set_enabled(enabled)
+            fn()
+            timings.append(per_call_us(fn, args.calls))
+        print(f"{label:>24} {timings[0]:>12.2f} {timings[1]:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
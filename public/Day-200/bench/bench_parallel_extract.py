@@ -0,0 +1,61 @@
+"""
+Throughput of DocumentProcessor.extract_text on a generated multi-hundred
+page PDF at 1, 2, 4 and 8 worker processes. Requires PyMuPDF. Run from the
+Day-200 directory:
+
+    python bench/bench_parallel_extract.py --pages 400
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fitz  # noqa: E402
+from document_processor import DocumentProcessor  # noqa: E402
+from bench_qa_index import make_document  # noqa: E402
+
+
+def make_pdf(path, pages, seed=7):
+    """Write a PDF with ``pages`` pages of deterministic filler text."""
+    text = make_document(pages * 3000, seed=seed)
+    doc = fitz.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_textbox(fitz.Rect(36, 36, 576, 806), text[page_num * 3000:(page_num + 1) * 3000], fontsize=8)
+    doc.save(path)
+    doc.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.pdf")
+        make_pdf(path, args.pages)
+        print(f"{args.pages} pages, {os.path.getsize(path) / 1024 / 1024:.1f} MiB, {os.cpu_count()} CPUs")
+
+        reference = None
+        for workers in args.workers:
+            processor = DocumentProcessor(workers=workers)
+            processor.extract_text(path)  # warm up the pool
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                text = processor.extract_text(path)
+                best = min(best, time.perf_counter() - start)
+            processor.close()
+
+            reference = reference or text
+            assert text == reference, "parallel extraction changed the output"
+            print(f"workers={workers}: {best * 1000:8.1f} ms  {args.pages / best:8.1f} pages/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Per-question latency of AIModels.answer_from_document as documents grow.
+
+Compares the indexed keyword and BM25 modes against the previous full
+sentence scan. Run from the Day-200 directory:
+
+    python bench/bench_qa_index.py --max-mb 50
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_models import AIModels  # noqa: E402
+
+SIZES_KB = [10, 100, 1024, 10 * 1024, 50 * 1024]
+NEEDLE = "The settlement deadline for the zephyrine contract is June 30, 2031."
+QUESTIONS = [
+    "When is the zephyrine settlement deadline?",
+    "What is the zephyrine contract?",
+]
+
+
+def make_vocabulary(rng, size=5000):
+    """Build a deterministic vocabulary of pronounceable filler words."""
+    syllables = ["ka", "lo", "mi", "ra", "te", "nu", "po", "si", "ve", "do", "qua", "bre"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))))
+    return sorted(words)
+
+
+def make_document(size_bytes, seed=42):
+    """Generate roughly ``size_bytes`` of text with the needle sentence in the middle."""
+    rng = random.Random(seed)
+    vocabulary = make_vocabulary(rng)
+    sentences = []
+    written = 0
+    while written < size_bytes:
+        words = rng.choices(vocabulary, k=rng.randint(8, 20))
+        sentence = " ".join(words).capitalize() + "."
+        sentences.append(sentence)
+        written += len(sentence) + 1
+    sentences.insert(len(sentences) // 2, NEEDLE)
+    return " ".join(sentences)
+
+
+def legacy_answer(models, question, document):
+    """The pre-index scoring loop: rescans and re-tokenizes every sentence."""
+    question_words = models._clean_and_tokenize(question.lower())
+    keywords = [w for w in question_words if w not in models.stop_words and len(w) > 2]
+    best, best_score = None, 0
+    for sentence in document.tokens.sentences():
+        sentence_words = models._clean_and_tokenize(sentence.lower())
+        matches = sum(1 for k in keywords if k in sentence_words)
+        phrase_matches = sum(1 for k in keywords if k in sentence.lower())
+        score = matches + phrase_matches * 0.5
+        if score > best_score:
+            best, best_score = sentence, score
+    return best
+
+
+def time_per_question(fn, repeat):
+    """Median seconds per call over ``repeat`` rounds of all benchmark questions."""
+    timings = []
+    for _ in range(repeat):
+        for question in QUESTIONS:
+            start = time.perf_counter()
+            fn(question)
+            timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-mb", type=float, default=50, help="largest document size to test")
+    parser.add_argument("--scan-max-mb", type=float, default=1, help="largest size to run the legacy scan on")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    models = AIModels()
+    print(f"{'size':>10} {'sentences':>10} {'prepare s':>10} {'scan ms':>10} {'keyword ms':>11} {'bm25 ms':>10}")
+    for size_kb in SIZES_KB:
+        if size_kb > args.max_mb * 1024:
+            break
+        text = make_document(size_kb * 1024)
+
+        start = time.perf_counter()
+        document = models.prepare_document(text)
+        prepare = time.perf_counter() - start
+
+        if size_kb <= args.scan_max_mb * 1024:
+            scan_ms = f"{time_per_question(lambda q: legacy_answer(models, q, document), 1) * 1000:10.2f}"
+        else:
+            scan_ms = f"{'-':>10}"
+        keyword = time_per_question(lambda q: models.answer_from_document(q, document), args.repeat)
+        bm25 = time_per_question(lambda q: models.answer_from_document(q, document, "bm25"), args.repeat)
+
+        answer = models.answer_from_document(QUESTIONS[0], document)
+        assert re.search(r"2031", answer or ""), f"needle not found: {answer!r}"
+
+        print(f"{size_kb:>8}KB {document.sentence_count:>10} {prepare:>10.2f} {scan_ms} "
+              f"{keyword * 1000:>11.3f} {bm25 * 1000:>10.3f}")
+        del document, text
+
+
+if __name__ == "__main__":
+    main()
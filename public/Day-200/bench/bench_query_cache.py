@@ -0,0 +1,59 @@
+"""
+Latency of repeated questions with and without the query cache.
+
+Asks a small set of rephrased questions many times, against raw context
+text (AIModels.answer_question) and against a processed document
+(AIModels.answer_from_document), so most calls repeat an earlier
+keyword set. Run from the Day-200 directory:
+
+    python bench/bench_query_cache.py --kb 500 --questions 2000
+"""
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ai_models import AIModels  # noqa: E402
+from query_cache import QueryCache  # noqa: E402
+from bench_qa_index import make_document, QUESTIONS  # noqa: E402
+
+# Rephrasings that reduce to the same keywords as QUESTIONS
+REPHRASED = [question.lower().rstrip("?") + " please?" for question in QUESTIONS]
+
+
+def run(ask, questions):
+    latencies = []
+    for number in range(questions):
+        question = (QUESTIONS + REPHRASED)[number % (2 * len(QUESTIONS))]
+        start = time.perf_counter()
+        ask(question)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+    return statistics.median(latencies), latencies[int(len(latencies) * 0.99) - 1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--kb", type=int, default=500)
+    parser.add_argument("--questions", type=int, default=2000)
+    args = parser.parse_args()
+
+    text = make_document(args.kb * 1024)
+    print(f"{'':>24} {'p50 ms':>9} {'p99 ms':>9}")
+    for label, cache in (("no cache", None), ("query cache", QueryCache())):
+        models = AIModels(query_cache=cache)
+        document = models.prepare_document(text)
+        # Raw context is tokenized on every uncached call, so ask it fewer times
+        p50, p99 = run(lambda question: models.answer_question(question, text), max(20, args.questions // 20))
+        print(f"{label + ' / context':>24} {p50:>9.3f} {p99:>9.3f}")
+        p50, p99 = run(lambda question: models.answer_from_document(question, document), args.questions)
+        print(f"{label + ' / document':>24} {p50:>9.3f} {p99:>9.3f}")
+        if cache is not None:
+            print(f"cache stats: {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
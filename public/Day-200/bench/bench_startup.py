@@ -0,0 +1,58 @@
+"""
+Cold start time and resident memory of a fresh process that imports the app.
+
+Each run starts a new interpreter, imports ``app`` and reports the import
+time and peak RSS; the ``+ backends`` row also imports the PDF and DOCX
+backends, as the gunicorn master does before forking workers. Run from
+the Day-200 directory:
+
+    python bench/bench_startup.py --runs 5
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+DAY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHILD = """
+import sys, time, json, resource
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+if {preload}:
+    from document_processor import preload_backends
+    preload_backends()
+done = time.perf_counter()
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'import_s': imported - start, 'total_s': done - start,
+                  'rss_mb': peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024}}))
+"""
+
+
+def measure(preload, runs):
+    samples = []
+    for _ in range(runs):
+        child = subprocess.run([sys.executable, '-c', CHILD.format(preload=preload)], cwd=DAY_DIR,
+                               capture_output=True, text=True, check=True,
+                               env=dict(os.environ, LOG_LEVEL='WARNING'))
+        samples.append(json.loads(child.stdout.strip().splitlines()[-1]))
+    return {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'':>12} {'import ms':>10} {'total ms':>10} {'peak RSS MB':>12}")
+    for label, preload in (("app", False), ("+ backends", True)):
+        result = measure(preload, args.runs)
+        print(f"{label:>12} {result['import_s'] * 1000:>10.0f} {result['total_s'] * 1000:>10.0f} "
+              f"{result['rss_mb']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
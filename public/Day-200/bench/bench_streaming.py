@@ -0,0 +1,65 @@
+"""
+Time to first byte and to the full body of /upload and /summarize, buffered and streamed.
+
+Uploads a generated ``--mb`` text file and summarizes it through the
+Flask test client, once as a plain JSON response and once with
+``stream=1``. Caches are bypassed by varying the scoring method per run.
+Run from the Day-200 directory:
+
+    python bench/bench_streaming.py --mb 5
+"""
+import io
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+import app as app_module  # noqa: E402
+from bench_qa_index import make_document  # noqa: E402
+
+
+def timed(send):
+    """Return (ms to the first body chunk, ms to the whole body) of a response."""
+    start = time.perf_counter()
+    response = send()
+    first = None
+    for _ in response.response:
+        if first is None:
+            first = time.perf_counter()
+    done = time.perf_counter()
+    response.close()
+    return (first - start) * 1000, (done - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=float, default=5)
+    args = parser.parse_args()
+
+    text = make_document(int(args.mb * 1024 * 1024))
+    data = text.encode("utf-8")
+    client = app_module.app.test_client()
+
+    print(f"{'request':>28} {'first byte ms':>14} {'full body ms':>13}")
+    for stream in (False, True):
+        # The extraction cache is keyed by content, so vary the file per run
+        upload = data + (b" Streamed." if stream else b" Buffered.")
+        form = {"file": (io.BytesIO(upload), "bench.txt"), **({"stream": "1"} if stream else {})}
+        first, full = timed(lambda: client.post("/upload", data=form, content_type="multipart/form-data",
+                                                buffered=False))
+        print(f"{'upload' + (' stream' if stream else ''):>28} {first:>14.1f} {full:>13.1f}")
+
+    for strategy, scoring in (("global", "tfidf"), ("map_reduce", "centroid")):
+        for stream in (False, True):
+            payload = {"text": text, "strategy": strategy, "stream": stream,
+                       "scoring": scoring if stream else "frequency"}
+            first, full = timed(lambda: client.post("/summarize", json=payload, buffered=False))
+            label = f"summarize {strategy}" + (" stream" if stream else "")
+            print(f"{label:>28} {first:>14.1f} {full:>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Micro-benchmark of document preprocessing: the previous multi-pass
+tokenization versus the single-pass TokenizedDocument.
+
+The legacy path mirrors what summarize_text/answer_question did before:
+split sentences, tokenize the whole text once with two re.sub passes, then
+tokenize every sentence again. Run from the Day-200 directory:
+
+    python bench/bench_tokenizer.py --size-kb 1024
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import tracemalloc
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tokenizer import TokenizedDocument  # noqa: E402
+from bench_qa_index import make_document  # noqa: E402
+
+
+def legacy_clean_and_tokenize(text):
+    """The previous AIModels._clean_and_tokenize."""
+    text = re.sub(r'[^\w\s]', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
+    return [word.strip() for word in text.split() if word.strip()]
+
+
+def legacy_preprocess(text):
+    """Sentence split plus whole-text and per-sentence tokenization, as before."""
+    sentences = re.split(r'[.!?]+', text)
+    sentences = [s.strip() for s in sentences if s.strip() and len(s.strip()) > 10]
+    word_freq = Counter(legacy_clean_and_tokenize(text.lower()))
+    sentence_tokens = [legacy_clean_and_tokenize(s.lower()) for s in sentences]
+    return sentences, word_freq, sentence_tokens
+
+
+def measure(fn, text, repeat):
+    """Best wall time over ``repeat`` runs and peak traced memory of one run."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(text)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-kb", type=int, default=1024)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    text = make_document(args.size_kb * 1024)
+    print(f"document: {len(text) / 1024:.0f} KB")
+    for name, fn in (("legacy", legacy_preprocess), ("single-pass", TokenizedDocument)):
+        seconds, peak = measure(fn, text, args.repeat)
+        print(f"{name:>12}: {seconds * 1000:9.1f} ms  {len(text) / seconds / 1e6:6.2f} MB/s  "
+              f"peak {peak / 1024 / 1024:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Deterministic synthetic corpora for the benchmark suite.
+
+Every document is generated from a fixed seed, so two runs on different
+machines or commits measure identical inputs. Files are written once
+into a corpus directory and reused. PDF and DOCX files need PyMuPDF and
+python-docx; formats whose library is missing are skipped.
+
+    python bench/corpus.py --dir bench/.corpus --sizes 1KB 1MB --formats txt pdf
+"""
+import os
+import sys
+import random
+import argparse
+from typing import Dict, List, Optional
+
+try:
+    import fitz  # PyMuPDF
+    PYMUPDF_AVAILABLE = True
+except ImportError:
+    PYMUPDF_AVAILABLE = False
+
+try:
+    from docx import Document
+    DOCX_AVAILABLE = True
+except ImportError:
+    DOCX_AVAILABLE = False
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.corpus')
+
+SIZES = {'1KB': 1024, '100KB': 100 * 1024, '1MB': 1024 ** 2, '10MB': 10 * 1024 ** 2, '50MB': 50 * 1024 ** 2}
+FORMATS = ('txt', 'pdf', 'docx')
+
+# Sentences with known answers, spread through every document
+FACTS = [
+    ("The settlement deadline for the zephyrine contract is June 30, 2031.", "When is the zephyrine settlement deadline?"),
+    ("The quorvane archive is kept in Boston City.", "Where is the quorvane archive kept?"),
+    ("The vellumar audit found 4,200 missing invoices.", "How many invoices did the vellumar audit find missing?"),
+]
+QUESTIONS = [question for _, question in FACTS]
+
+SYLLABLES = ["ka", "lo", "mi", "ra", "te", "nu", "po", "si", "ve", "do", "qua", "bre"]
+COMMON_WORDS = ["the", "report", "team", "data", "of", "and", "budget", "meeting", "project", "with", "review", "plan"]
+PDF_PAGE_CHARS = 3000
+
+
+def available_formats() -> List[str]:
+    """Formats that can be generated with the installed libraries."""
+    return [fmt for fmt in FORMATS
+            if fmt == 'txt' or (fmt == 'pdf' and PYMUPDF_AVAILABLE) or (fmt == 'docx' and DOCX_AVAILABLE)]
+
+
+def generate_paragraphs(size_bytes: int, seed: int = 2024) -> List[str]:
+    """
+    Generate roughly ``size_bytes`` of English-like text as paragraphs.
+
+    Args:
+        size_bytes: Target UTF-8 size of the joined paragraphs
+        seed: Random seed; the same seed always gives the same text
+
+    Returns:
+        Paragraphs of a few sentences each, with ``FACTS`` spread evenly
+    """
+    rng = random.Random(seed)
+    vocabulary = sorted({"".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(4000)})
+    words = vocabulary + COMMON_WORDS * 40
+
+    paragraphs = []
+    sentences = []
+    written = 0
+    while written < size_bytes:
+        sentence = " ".join(rng.choices(words, k=rng.randint(6, 22))).capitalize() + rng.choice(".....?!")
+        sentences.append(sentence)
+        written += len(sentence) + 1
+        if len(sentences) >= rng.randint(3, 8):
+            paragraphs.append(" ".join(sentences))
+            sentences = []
+            written += 1
+    if sentences:
+        paragraphs.append(" ".join(sentences))
+
+    for position, (fact, _) in enumerate(FACTS, 1):
+        index = min(len(paragraphs) - 1, position * len(paragraphs) // (len(FACTS) + 1))
+        paragraphs[index] = f"{paragraphs[index]} {fact}"
+    return paragraphs
+
+
+def generate_text(size_bytes: int, seed: int = 2024) -> str:
+    """Generated text with paragraphs separated by blank lines, as ``clean_text`` produces."""
+    return "\n\n".join(generate_paragraphs(size_bytes, seed))
+
+
+def write_document(path: str, fmt: str, paragraphs: List[str]):
+    """Write paragraphs as a TXT, PDF or DOCX file."""
+    if fmt == 'txt':
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("\n\n".join(paragraphs))
+    elif fmt == 'pdf':
+        doc = fitz.open()
+        page_text = []
+        page_chars = 0
+        for paragraph in paragraphs + [None]:
+            if paragraph is None or (page_text and page_chars + len(paragraph) > PDF_PAGE_CHARS):
+                page = doc.new_page()
+                page.insert_textbox(fitz.Rect(36, 36, 576, 806), "\n".join(page_text), fontsize=7)
+                page_text, page_chars = [], 0
+            if paragraph is not None:
+                page_text.append(paragraph)
+                page_chars += len(paragraph)
+        doc.save(path, garbage=1, deflate=True)
+        doc.close()
+    elif fmt == 'docx':
+        doc = Document()
+        for paragraph in paragraphs:
+            doc.add_paragraph(paragraph)
+        doc.save(path)
+    else:
+        raise ValueError(f"Unknown corpus format: {fmt}")
+
+
+def ensure_corpus(directory: str = DEFAULT_DIR, sizes: Optional[List[str]] = None,
+                  formats: Optional[List[str]] = None) -> Dict[tuple, str]:
+    """
+    Generate any missing corpus files.
+
+    Args:
+        directory: Where corpus files are kept between runs
+        sizes: Size labels from ``SIZES``; defaults to all of them
+        formats: Formats to generate; defaults to every available one
+
+    Returns:
+        Mapping of (format, size label) to file path
+    """
+    os.makedirs(directory, exist_ok=True)
+    formats = [fmt for fmt in (formats or FORMATS) if fmt in available_formats()]
+    paths = {}
+    for size in sizes or list(SIZES):
+        paragraphs = None
+        for fmt in formats:
+            path = os.path.join(directory, f"corpus-{size}.{fmt}")
+            if not os.path.exists(path):
+                if paragraphs is None:
+                    paragraphs = generate_paragraphs(SIZES[size])
+                print(f"generating {path}", file=sys.stderr)
+                # Write under a temporary name so an interrupted run leaves no partial file
+                write_document(path + '.tmp', fmt, paragraphs)
+                os.replace(path + '.tmp', path)
+            paths[(fmt, size)] = path
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=DEFAULT_DIR)
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=list(SIZES))
+    parser.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    args = parser.parse_args()
+
+    for (fmt, size), path in sorted(ensure_corpus(args.dir, args.sizes, args.formats).items()):
+        print(f"{fmt:>5} {size:>6} {os.path.getsize(path):>12} {path}")
+
+
+if __name__ == "__main__":
+    main()
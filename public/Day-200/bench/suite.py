@@ -0,0 +1,259 @@
+"""
+Benchmark suite for the whole document pipeline.
+
+``run`` measures DocumentProcessor.extract_text, AIModels.summarize_text
+and AIModels.answer_question on the deterministic corpora from corpus.py,
+plus end-to-end /upload, /summarize and /ask requests through the Flask
+test client. Each case runs in a fresh process so its peak RSS is its
+own. Results are written as JSON with ops/sec, p50/p99 latency and peak
+RSS per case.
+
+``compare`` reads two result files and flags cases that got slower or
+bigger by more than a threshold; it exits with status 1 if any did.
+Run from the Day-200 directory:
+
+    python bench/suite.py run --sizes 1KB 1MB --output before.json
+    python bench/suite.py run --sizes 1KB 1MB --output after.json
+    python bench/suite.py compare before.json after.json --threshold 0.1
+
+End-to-end cases run with the in-memory caches disabled, so every
+request does the full work, and skip corpora above the app's 16 MB
+request limit.
+"""
+import io
+import os
+import sys
+import json
+import math
+import time
+import platform
+import argparse
+import resource
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import DEFAULT_DIR, FORMATS, QUESTIONS, SIZES, available_formats, ensure_corpus  # noqa: E402
+
+# Case name -> formats it runs on; text-based cases read the TXT corpus
+CASES = {
+    'extract': FORMATS,
+    'summarize': ('txt',),
+    'answer': ('txt',),
+    'http_upload': FORMATS,
+    'http_summarize': ('txt',),
+    'http_ask': ('txt',),
+}
+HTTP_LIMIT_BYTES = 16 * 1024 * 1024
+
+# Lower is better for these result fields; higher is better for ops_per_sec
+LOWER_IS_BETTER = ('p50_ms', 'p99_ms', 'peak_rss_mb')
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def make_operation(case, fmt, path):
+    """Build the callable one benchmark iteration runs, with the corpus already loaded."""
+    if case == 'extract':
+        from document_processor import DocumentProcessor
+        processor = DocumentProcessor()
+        return lambda i: processor.extract_text(path)
+
+    if case in ('summarize', 'answer'):
+        from ai_models import AIModels
+        models = AIModels()
+        with open(path, encoding='utf-8') as file:
+            text = file.read()
+        if case == 'summarize':
+            return lambda i: models.summarize_text(text)
+        return lambda i: models.answer_question(QUESTIONS[i % len(QUESTIONS)], text)
+
+    # End-to-end cases go through the whole Flask app with caching turned off
+    os.environ['CACHE_MAX_ITEMS'] = '0'
+    os.environ['QUERY_CACHE_MAX_ITEMS'] = '0'
+    os.environ.pop('CACHE_DISK_PATH', None)
+    import logging
+    import app as application
+    logging.disable(logging.INFO)
+    client = application.app.test_client()
+
+    if case == 'http_upload':
+        with open(path, 'rb') as file:
+            data = file.read()
+        name = os.path.basename(path)
+
+        def upload(i):
+            response = client.post('/upload', data={'file': (io.BytesIO(data), name)},
+                                   content_type='multipart/form-data')
+            document_id = response.get_json().get('document_id')
+            if document_id:
+                application.document_store.delete(document_id)
+            return response
+        return upload
+
+    with open(path, encoding='utf-8') as file:
+        text = file.read()
+    if case == 'http_summarize':
+        return lambda i: client.post('/summarize', json={'text': text})
+    return lambda i: client.post('/ask', json={'context': text, 'question': QUESTIONS[i % len(QUESTIONS)]})
+
+
+def run_case(spec):
+    """Run one case in this process and return its result record."""
+    operation = make_operation(spec['case'], spec['format'], spec['path'])
+
+    operation(0)  # warm up lazy imports, pools and compiled patterns
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < spec['repeat']:
+        start = time.perf_counter()
+        result = operation(len(latencies))
+        latencies.append(time.perf_counter() - start)
+        status = getattr(result, 'status_code', 200)
+        if result is None or status >= 400:
+            raise RuntimeError(f"{spec['case']} failed with {status if result is not None else 'None'}")
+        if time.perf_counter() - started > spec['budget']:
+            break
+
+    total = sum(latencies)
+    return {
+        'case': spec['case'],
+        'format': spec['format'],
+        'size': spec['size'],
+        'bytes': os.path.getsize(spec['path']),
+        'ops': len(latencies),
+        'ops_per_sec': len(latencies) / total if total else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run(args):
+    formats = [fmt for fmt in args.formats if fmt in available_formats()]
+    skipped = sorted(set(args.formats) - set(formats))
+    if skipped:
+        print(f"skipping formats without their library installed: {', '.join(skipped)}", file=sys.stderr)
+    paths = ensure_corpus(args.corpus_dir, args.sizes, formats)
+
+    results = []
+    for case in args.cases:
+        for size in args.sizes:
+            for fmt in CASES[case]:
+                if fmt not in formats:
+                    continue
+                path = paths[(fmt, size)]
+                if case.startswith('http_') and os.path.getsize(path) > HTTP_LIMIT_BYTES:
+                    continue
+                spec = {'case': case, 'format': fmt, 'size': size, 'path': path,
+                        'repeat': args.repeat, 'budget': args.budget}
+                child = subprocess.run([sys.executable, os.path.abspath(__file__), 'case', json.dumps(spec)],
+                                       capture_output=True, text=True)
+                if child.returncode != 0:
+                    print(f"{case} {fmt} {size} failed:\n{child.stderr[-2000:]}", file=sys.stderr)
+                    continue
+                result = json.loads(child.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(f"{case:>15} {fmt:>5} {size:>6} {result['ops_per_sec']:>10.2f} ops/s "
+                      f"p50 {result['p50_ms']:>10.2f} ms  p99 {result['p99_ms']:>10.2f} ms  "
+                      f"rss {result['peak_rss_mb']:>8.1f} MB", file=sys.stderr)
+
+    report = {
+        'meta': {
+            'commit': git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'repeat': args.repeat,
+            'budget_seconds': args.budget,
+        },
+        'results': results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+
+def compare(args):
+    with open(args.before) as file:
+        before = {(r['case'], r['format'], r['size']): r for r in json.load(file)['results']}
+    with open(args.after) as file:
+        after = {(r['case'], r['format'], r['size']): r for r in json.load(file)['results']}
+
+    regressions = 0
+    print(f"{'case':>15} {'format':>6} {'size':>6} {'ops/s':>18} {'p50 ms':>18} {'p99 ms':>18} {'rss MB':>16}")
+    for key in sorted(before.keys() & after.keys()):
+        old, new = before[key], after[key]
+        cells = []
+        flagged = False
+        for field in ('ops_per_sec', 'p50_ms', 'p99_ms', 'peak_rss_mb'):
+            change = (new[field] - old[field]) / old[field] if old[field] else 0.0
+            worse = change > args.threshold if field in LOWER_IS_BETTER else change < -args.threshold
+            flagged |= worse
+            cells.append(f"{new[field]:>9.2f} {change:+6.1%}{'!' if worse else ' '}")
+        regressions += flagged
+        print(f"{key[0]:>15} {key[1]:>6} {key[2]:>6} " + " ".join(cells) + ("  REGRESSION" if flagged else ""))
+
+    for key in sorted(before.keys() ^ after.keys()):
+        print(f"{key[0]:>15} {key[1]:>6} {key[2]:>6}  only in {'before' if key in before else 'after'}")
+    print(f"{regressions} regression(s) beyond {args.threshold:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='measure every selected case')
+    run_parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    run_parser.add_argument('--sizes', nargs='+', choices=list(SIZES), default=list(SIZES))
+    run_parser.add_argument('--formats', nargs='+', choices=FORMATS, default=list(FORMATS))
+    run_parser.add_argument('--repeat', type=int, default=20, help='iterations per case')
+    run_parser.add_argument('--budget', type=float, default=30, help='stop a case after this many seconds')
+    run_parser.add_argument('--corpus-dir', default=DEFAULT_DIR)
+    run_parser.add_argument('--output', help='JSON file to write; defaults to stdout')
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two result files')
+    compare_parser.add_argument('before')
+    compare_parser.add_argument('after')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help='allowed relative change')
+
+    case_parser = commands.add_parser('case', help=argparse.SUPPRESS)
+    case_parser.add_argument('spec')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    elif args.command == 'compare':
+        sys.exit(compare(args))
+    else:
+        print(json.dumps(run_case(json.loads(args.spec))))
+
+
+if __name__ == '__main__':
+    main()
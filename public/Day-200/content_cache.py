@@ -0,0 +1,222 @@
+import sys
+import time
+import hashlib
+import logging
+import sqlite3
+import threading
+from typing import Optional, Dict
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# sqlite connections inherited from the parent process, kept open but unused
+_inherited_connections = []
+
+
+def abandon_connections(*connections):
+    """
+    Set aside sqlite connections inherited across a fork.
+
+    An sqlite connection must not be used by two processes, so a forked
+    worker opens its own. The inherited ones are never used again but also
+    never closed: closing them in the child could delete a WAL file the
+    parent is still using.
+
+    Args:
+        connections: Connections opened before the fork; None is ignored
+    """
+    _inherited_connections.extend(db for db in connections if db is not None)
+
+
+def content_hash(data) -> str:
+    """
+    Hash document content for use as a cache key.
+
+    Args:
+        data: Raw bytes, or text which is hashed as UTF-8
+
+    Returns:
+        Hex SHA-256 digest
+    """
+    return content_hasher(data).hexdigest()
+
+
+def content_hasher(data):
+    """
+    Start a ``content_hash`` that more content can be added to with ``update``.
+
+    Args:
+        data: Raw bytes, or text which is hashed as UTF-8
+
+    Returns:
+        hashlib SHA-256 object
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8', 'surrogatepass')
+    return hashlib.sha256(data)
+
+
+class ContentCache:
+    """
+    Two-tier cache of text values keyed by content hash.
+
+    Entries live in an in-memory LRU tier and, when a database path is
+    given, in an sqlite tier that survives restarts and is shared between
+    worker processes. Both tiers evict least recently used entries once
+    their size limit is exceeded.
+    """
+
+    def __init__(self, namespace: str, max_items: int = 256, max_bytes: int = 64 * 1024 * 1024,
+                 disk_path: Optional[str] = None, disk_max_bytes: int = 512 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            namespace: Prefix that keeps keys of different caches apart in a shared database
+            max_items: Maximum number of entries in memory
+            max_bytes: Memory cap for cached values
+            disk_path: sqlite database file for the on-disk tier, or None to disable it
+            disk_max_bytes: Size cap for values stored on disk
+        """
+        self.namespace = namespace
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()  # key -> value
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        self.disk_path = disk_path
+        self._db = None
+        self._open_disk()
+
+    def _open_disk(self):
+        """Connect to the sqlite tier, if one is configured."""
+        if not self.disk_path:
+            return
+        try:
+            self._db = sqlite3.connect(self.disk_path, check_same_thread=False, isolation_level=None)
+            self._db.execute('PRAGMA journal_mode=WAL')
+            self._db.execute('CREATE TABLE IF NOT EXISTS content_cache ('
+                             'key TEXT PRIMARY KEY, value BLOB NOT NULL, '
+                             'size INTEGER NOT NULL, last_access REAL NOT NULL)')
+            self._db.execute('CREATE INDEX IF NOT EXISTS content_cache_lru ON content_cache (last_access)')
+        except sqlite3.Error as e:
+            logger.error(f"Disabling on-disk cache at {self.disk_path}: {str(e)}")
+            self._db = None
+
+    def reopen(self):
+        """
+        Open a fresh connection to the sqlite tier in a forked process.
+
+        A server that loads the app before forking workers calls this in
+        each worker; see ``abandon_connections``.
+        """
+        abandon_connections(self._db)
+        self._lock = threading.Lock()
+        self._db = None
+        self._open_disk()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Look up a cached value.
+
+        Args:
+            key: Cache key, typically built from ``content_hash``
+
+        Returns:
+            Cached value or None on a miss
+        """
+        with self._lock:
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                self._stats['memory_hits'] += 1
+                return value
+
+            value = self._disk_get(key)
+            if value is not None:
+                self._stats['disk_hits'] += 1
+                self._memory_put(key, value)
+                return value
+
+            self._stats['misses'] += 1
+            return None
+
+    def put(self, key: str, value: str):
+        """
+        Store a value in every enabled tier.
+
+        Args:
+            key: Cache key
+            value: Text to cache
+        """
+        with self._lock:
+            self._memory_put(key, value)
+            self._disk_put(key, value)
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss counters and current memory usage."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._memory)
+            stats['bytes'] = self._memory_bytes
+            return stats
+
+    def _memory_put(self, key: str, value: str):
+        """Insert into the LRU tier; the caller must hold the lock."""
+        size = sys.getsizeof(value)
+        if size > self.max_bytes:
+            return
+
+        previous = self._memory.pop(key, None)
+        if previous is not None:
+            self._memory_bytes -= sys.getsizeof(previous)
+        self._memory[key] = value
+        self._memory_bytes += size
+
+        while len(self._memory) > self.max_items or self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= sys.getsizeof(evicted)
+
+    def _disk_get(self, key: str) -> Optional[str]:
+        """Read from the sqlite tier; the caller must hold the lock."""
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute('SELECT value FROM content_cache WHERE key = ?',
+                                   (f'{self.namespace}:{key}',)).fetchone()
+            if row is None:
+                return None
+            self._db.execute('UPDATE content_cache SET last_access = ? WHERE key = ?',
+                             (time.time(), f'{self.namespace}:{key}'))
+            return row[0].decode('utf-8', 'surrogatepass')
+        except sqlite3.Error as e:
+            logger.error(f"Error reading on-disk cache: {str(e)}")
+            return None
+
+    def _disk_put(self, key: str, value: str):
+        """Write to the sqlite tier and evict old entries; the caller must hold the lock."""
+        if self._db is None:
+            return
+        data = value.encode('utf-8', 'surrogatepass')
+        if len(data) > self.disk_max_bytes:
+            return
+        try:
+            self._db.execute('INSERT OR REPLACE INTO content_cache (key, value, size, last_access) '
+                             'VALUES (?, ?, ?, ?)', (f'{self.namespace}:{key}', data, len(data), time.time()))
+
+            total = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM content_cache').fetchone()[0]
+            if total > self.disk_max_bytes:
+                # Delete the least recently used rows until the cap is met again
+                rows = self._db.execute('SELECT key, size FROM content_cache ORDER BY last_access').fetchall()
+                stale = []
+                for row_key, size in rows:
+                    if total <= self.disk_max_bytes:
+                        break
+                    stale.append((row_key,))
+                    total -= size
+                self._db.executemany('DELETE FROM content_cache WHERE key = ?', stale)
+        except sqlite3.Error as e:
+            logger.error(f"Error writing on-disk cache: {str(e)}")
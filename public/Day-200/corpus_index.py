@@ -0,0 +1,286 @@
+import os
+import re
+import glob
+import math
+import heapq
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from content_cache import abandon_connections
+
+logger = logging.getLogger(__name__)
+
+# Keep '_' inside words, as the tokenizer's \w+ pattern does
+FTS_TOKENIZER = "unicode61 remove_diacritics 2 tokenchars '_'"
+FTS_WORD = re.compile(r'\w+')
+
+# BM25 parameters, the FTS5 defaults
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def fts_tokens(text: str) -> List[str]:
+    """Split text into terms the way FTS_TOKENIZER does: lowercase, without diacritics."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return FTS_WORD.findall(''.join(char for char in decomposed if not unicodedata.combining(char)))
+
+
+class CorpusHit(NamedTuple):
+    """One sentence retrieved from the corpus."""
+    document_id: str
+    filename: str
+    sentence_id: int
+    sentence: str
+    rank: float  # negated bm25 score over the whole corpus; lower is better
+
+
+class CorpusIndex:
+    """
+    Persistent full-text index of the sentences of many documents.
+
+    Documents are spread over several sqlite FTS5 databases by a hash of
+    their id. Adding or deleting a document touches only its own shard
+    and only its own rows, so the index never has to be rebuilt; searches
+    query every shard and merge the best matches.
+
+    Each shard ranks by bm25 with its own term statistics, so shard ranks
+    are not comparable. The candidates every shard returns are therefore
+    re-scored with corpus-wide document frequencies and sentence lengths
+    before they are merged; only the choice of candidates per shard still
+    depends on shard-local statistics.
+    """
+
+    def __init__(self, directory: str, shards: int = 4):
+        """
+        Initialize the index, opening or creating its shard databases.
+
+        Args:
+            directory: Directory holding one sqlite file per shard
+            shards: Number of shards for a new index; an existing index keeps its own count
+        """
+        os.makedirs(directory, exist_ok=True)
+        existing = len(glob.glob(os.path.join(directory, 'corpus-*.db')))
+        if existing and existing != shards:
+            logger.warning(f"Corpus index at {directory} has {existing} shards; ignoring the configured {shards}")
+        self.directory = directory
+        self.shard_count = existing or max(1, shards)
+        self._connect()
+
+    def _connect(self):
+        self._shards = [self._open_shard(os.path.join(self.directory, f'corpus-{n}.db'))
+                        for n in range(self.shard_count)]
+        self._locks = [threading.Lock() for _ in self._shards]
+        # (sentences, sentences with a token count, tokens) per shard,
+        # recomputed after the shard changes
+        self._totals: List[Optional[Tuple[int, int, int]]] = [None] * self.shard_count
+        self._executor = None
+        if self.shard_count > 1:
+            self._executor = ThreadPoolExecutor(max_workers=self.shard_count, thread_name_prefix="corpus-search")
+
+    def reopen(self):
+        """
+        Open fresh shard connections in a forked process; see
+        ``content_cache.abandon_connections``.
+        """
+        abandon_connections(*self._shards)
+        self._connect()
+
+    @staticmethod
+    def _open_shard(path: str) -> sqlite3.Connection:
+        db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        db.execute('PRAGMA journal_mode=WAL')
+        db.execute('CREATE TABLE IF NOT EXISTS documents ('
+                   'document_id TEXT PRIMARY KEY, filename TEXT NOT NULL, '
+                   'first_row INTEGER NOT NULL, last_row INTEGER NOT NULL, '
+                   'tokens INTEGER NOT NULL DEFAULT 0)')
+        columns = {row[1] for row in db.execute('PRAGMA table_info(documents)')}
+        if 'tokens' not in columns:
+            # Shards created before token counts were kept; their documents
+            # are left out of the average sentence length until added again
+            db.execute('ALTER TABLE documents ADD COLUMN tokens INTEGER NOT NULL DEFAULT 0')
+        db.execute('CREATE VIRTUAL TABLE IF NOT EXISTS sentences USING fts5('
+                   f'text, document_id UNINDEXED, sentence_id UNINDEXED, tokenize="{FTS_TOKENIZER}")')
+        # Per-term document (here: sentence) frequencies for corpus-wide bm25
+        db.execute("CREATE VIRTUAL TABLE IF NOT EXISTS sentence_terms USING fts5vocab(sentences, 'row')")
+        return db
+
+    def _shard_of(self, document_id: str) -> int:
+        digest = hashlib.sha1(document_id.encode('utf-8')).digest()
+        return int.from_bytes(digest[:4], 'big') % self.shard_count
+
+    def add(self, document_id: str, filename: str, sentences: Iterable[str]) -> bool:
+        """
+        Index the sentences of a document, replacing any earlier version of it.
+
+        Args:
+            document_id: Stable id of the document
+            filename: Name shown with search results
+            sentences: Sentences in document order
+
+        Returns:
+            True if the document was indexed, False on a database error
+        """
+        sentences = list(sentences)
+        tokens = sum(len(fts_tokens(sentence)) for sentence in sentences)
+        shard = self._shard_of(document_id)
+        db = self._shards[shard]
+        with self._locks[shard]:
+            self._totals[shard] = None
+            try:
+                db.execute('BEGIN IMMEDIATE')
+                self._delete_rows(db, document_id)
+                # Rows of one document get consecutive rowids, so it can be
+                # deleted later with a single range scan
+                first_row = db.execute('SELECT COALESCE(MAX(rowid), 0) + 1 FROM sentences').fetchone()[0]
+                db.executemany('INSERT INTO sentences (rowid, text, document_id, sentence_id) VALUES (?, ?, ?, ?)',
+                               ((first_row + sentence_id, sentence, document_id, sentence_id)
+                                for sentence_id, sentence in enumerate(sentences)))
+                last_row = db.execute('SELECT COALESCE(MAX(rowid), 0) FROM sentences').fetchone()[0]
+                db.execute('INSERT INTO documents (document_id, filename, first_row, last_row, tokens) '
+                           'VALUES (?, ?, ?, ?, ?)', (document_id, filename, first_row, last_row, tokens))
+                db.execute('COMMIT')
+                return True
+            except sqlite3.Error as e:
+                if db.in_transaction:
+                    db.execute('ROLLBACK')
+                logger.error(f"Error indexing document {document_id}: {str(e)}")
+                return False
+
+    def delete(self, document_id: str) -> bool:
+        """
+        Remove a document from the index.
+
+        Args:
+            document_id: Id the document was added with
+
+        Returns:
+            True if the document was indexed and has been removed
+        """
+        shard = self._shard_of(document_id)
+        db = self._shards[shard]
+        with self._locks[shard]:
+            self._totals[shard] = None
+            try:
+                db.execute('BEGIN IMMEDIATE')
+                removed = self._delete_rows(db, document_id)
+                db.execute('COMMIT')
+                return removed
+            except sqlite3.Error as e:
+                if db.in_transaction:
+                    db.execute('ROLLBACK')
+                logger.error(f"Error deleting document {document_id} from the corpus index: {str(e)}")
+                return False
+
+    @staticmethod
+    def _delete_rows(db: sqlite3.Connection, document_id: str) -> bool:
+        """Delete a document's sentences and record; the caller must hold the shard lock."""
+        row = db.execute('SELECT first_row, last_row FROM documents WHERE document_id = ?', (document_id,)).fetchone()
+        if row is None:
+            return False
+        db.execute('DELETE FROM sentences WHERE rowid BETWEEN ? AND ?', row)
+        db.execute('DELETE FROM documents WHERE document_id = ?', (document_id,))
+        return True
+
+    def search(self, keywords: List[str], limit: int = 50) -> List[CorpusHit]:
+        """
+        Find the sentences that best match any of the keywords.
+
+        Args:
+            keywords: Lowercase question keywords
+            limit: Maximum number of sentences to return
+
+        Returns:
+            Matching sentences, best first by bm25 over the whole corpus
+        """
+        if not keywords or limit <= 0:
+            return []
+        # Quote every keyword so FTS5 never parses it as query syntax
+        query = " OR ".join('"' + keyword.replace('"', '""') + '"' for keyword in keywords)
+        terms = [term for keyword in keywords for term in fts_tokens(keyword)]
+
+        if self._executor is None:
+            results = [self._search_shard(0, query, terms, limit)]
+        else:
+            results = list(self._executor.map(lambda shard: self._search_shard(shard, query, terms, limit),
+                                              range(self.shard_count)))
+        hits = [hit for shard_hits, _, _ in results for hit in shard_hits]
+        if not hits:
+            return []
+
+        sentences, measured, tokens = (sum(column) for column in zip(*(result[1] for result in results)))
+        frequencies = Counter()
+        for _, _, shard_frequencies in results:
+            frequencies.update(shard_frequencies)
+        average_length = tokens / measured if measured else None
+        rescored = [hit._replace(rank=-self._bm25(hit.sentence, terms, frequencies, sentences, average_length))
+                    for hit in hits]
+        return heapq.nsmallest(limit, rescored, key=lambda hit: hit.rank)
+
+    @staticmethod
+    def _bm25(sentence: str, terms: List[str], frequencies: Dict[str, int], sentences: int,
+              average_length: Optional[float]) -> float:
+        """Score one sentence with corpus-wide statistics, as FTS5's bm25() does within a shard."""
+        counts = Counter(fts_tokens(sentence))
+        length = sum(counts.values())
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * length / (average_length or length or 1))
+        score = 0.0
+        for term in terms:
+            tf = counts.get(term, 0)
+            if tf:
+                df = frequencies.get(term, 0)
+                idf = max(math.log((sentences - df + 0.5) / (df + 0.5)), 1e-6)
+                score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+        return score
+
+    def _search_shard(self, shard: int, query: str, terms: List[str],
+                      limit: int) -> Tuple[List[CorpusHit], Tuple[int, int, int], Dict[str, int]]:
+        """Best hits of one shard with its sentence and token totals and term frequencies."""
+        db = self._shards[shard]
+        with self._locks[shard]:
+            try:
+                # A plain ORDER BY rank LIMIT lets FTS5 keep only the best rows
+                rows = db.execute('SELECT document_id, sentence_id, text, rank FROM sentences '
+                                  'WHERE sentences MATCH ? ORDER BY rank LIMIT ?', (query, limit)).fetchall()
+                document_ids = list({row[0] for row in rows})
+                filenames = dict(db.execute(
+                    f"SELECT document_id, filename FROM documents WHERE document_id IN ({','.join('?' * len(document_ids))})",
+                    document_ids).fetchall()) if document_ids else {}
+                unique_terms = list(set(terms))
+                frequencies = dict(db.execute(
+                    f"SELECT term, doc FROM sentence_terms WHERE term IN ({','.join('?' * len(unique_terms))})",
+                    unique_terms).fetchall()) if unique_terms else {}
+                if self._totals[shard] is None:
+                    self._totals[shard] = db.execute(
+                        'SELECT COALESCE(SUM(last_row - first_row + 1), 0), '
+                        'COALESCE(SUM(CASE WHEN tokens > 0 THEN last_row - first_row + 1 END), 0), '
+                        'COALESCE(SUM(tokens), 0) FROM documents').fetchone()
+                totals = self._totals[shard]
+            except sqlite3.Error as e:
+                logger.error(f"Error searching corpus shard {shard}: {str(e)}")
+                return [], (0, 0, 0), {}
+        hits = [CorpusHit(document_id, filenames.get(document_id, ''), sentence_id, text, rank)
+                for document_id, sentence_id, text, rank in rows]
+        return hits, totals, frequencies
+
+    def stats(self) -> Dict[str, int]:
+        """Return the number of indexed documents and sentences."""
+        documents = sentences = 0
+        for db, lock in zip(self._shards, self._locks):
+            with lock:
+                documents += db.execute('SELECT COUNT(*) FROM documents').fetchone()[0]
+                sentences += db.execute('SELECT COALESCE(SUM(last_row - first_row + 1), 0) FROM documents').fetchone()[0]
+        return {'documents': documents, 'sentences': sentences, 'shards': self.shard_count}
+
+    def close(self):
+        """Close every shard database."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for db, lock in zip(self._shards, self._locks):
+            with lock:
+                db.close()
@@ -0,0 +1,248 @@
+import re
+import time
+import zlib
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional
+from tokenizer import WORD_PATTERN
+from metrics import observe_stage
+
+# Lines and sentences shorter than this are always kept; short fragments
+# such as list markers or "Yes." repeat legitimately. Numbered page headers
+# and footers are matched separately, whatever their length.
+MIN_UNIT_CHARS = 20
+
+# Word n-grams hashed into each signature
+SHINGLE_WORDS = 3
+
+# One-permutation MinHash: every shingle hash falls into one of SIGNATURE_BINS
+# bins, which keep their smallest value. Bins are grouped into bands of
+# BAND_BINS for locality-sensitive lookup, so a near-duplicate is found by
+# hashing its own bands instead of comparing it with every earlier unit.
+SIGNATURE_BINS = 16
+BAND_BINS = 2
+EMPTY_BIN = 1 << 59  # above every bin value
+EMPTY_BAND = (EMPTY_BIN,) * BAND_BINS
+HASH_MASK = (1 << 63) - 1
+
+# Page numbers and dates are masked in the first and last line of a page
+# when it has no sentence punctuation, so running headers and footers such
+# as "Page 3 of 10" match those of the previous page. Lines elsewhere keep
+# their digits: table rows and log lines often differ only in their numbers.
+DIGITS = re.compile(r'\d+')
+LETTER = re.compile(r'[^\W\d_]')
+
+# Longest run of text held back while waiting for the end of its line
+MAX_PENDING_CHARS = 1024 * 1024
+
+# A sentence with its terminator; the whitespace after it starts the next piece
+SENTENCE_PIECE = re.compile(r'[^.!?]*(?:[.!?]+|$)')
+
+
+class _WordHashes(dict):
+    """Deterministic per-word hashes, computed once per distinct word."""
+
+    def __missing__(self, word: str) -> int:
+        value = self[word] = zlib.crc32(word.encode('utf-8', 'surrogatepass'))
+        return value
+
+
+class NearDuplicateFilter:
+    """
+    Streaming filter that drops lines and sentences repeating earlier ones.
+
+    Repeated page headers, footers and boilerplate inflate term counts and
+    end up in summaries. Each sentence of every line gets a MinHash
+    signature of its word shingles; a sentence whose estimated Jaccard
+    similarity to an earlier one reaches the threshold is removed, and a
+    line left empty is removed with its line break. When the input comes
+    page by page, a numbered first or last line is also removed when it
+    equals the same line of the previous page with digits masked, so
+    headers and footers such as "Page 3 of 10" go as well. Every sentence
+    costs a constant number of lookups, so the whole pass is linear in
+    the input.
+    """
+
+    def __init__(self, threshold: float = 0.8, min_chars: int = MIN_UNIT_CHARS, max_units: int = 20000):
+        """
+        Initialize the filter.
+
+        Args:
+            threshold: Estimated Jaccard similarity at which a sentence counts as a duplicate
+            min_chars: Sentences shorter than this are never removed
+            max_units: Signatures remembered before the filter starts over, bounding its memory
+        """
+        self.threshold = threshold
+        self.min_chars = min_chars
+        self.max_units = max_units
+        self.stats = {'units': 0, 'units_removed': 0, 'chars': 0, 'chars_removed': 0}
+        self._word_hashes = _WordHashes()
+        self._bands: Dict[int, int] = {}  # band hash -> unit number
+        self._signatures = array('q')  # SIGNATURE_BINS values per remembered unit
+        self._previous_edges = set()  # (position, masked line) of the previous page's numbered edges
+
+    def filter(self, chunks: Iterable[str], pages: bool = False) -> Iterator[str]:
+        """
+        Pass text chunks through with near-duplicate lines and sentences removed.
+
+        Lines split across chunks are held back until they are complete, so
+        at most one partial line is buffered. Page chunks are taken whole.
+
+        Args:
+            chunks: Text chunks, e.g. from ``DocumentProcessor.iter_text``
+            pages: Whether every chunk is one page, as for PDFs, so that
+                numbered headers and footers can be recognized
+
+        Yields:
+            Filtered chunks; chunks left empty are skipped
+        """
+        elapsed = 0.0
+        pending = ''
+        try:
+            for chunk in chunks:
+                start = time.perf_counter()
+                if pages:
+                    cut, text = len(chunk), chunk
+                else:
+                    text = pending + chunk
+                    cut = text.rfind('\n') + 1
+                    if not cut and len(text) >= MAX_PENDING_CHARS:
+                        # No line break in sight; cut after the last sentence instead
+                        cut = max(text.rfind('.'), text.rfind('!'), text.rfind('?')) + 1 or len(text)
+                    pending = text[cut:]
+                kept = self._filter_lines(text[:cut], pages) if cut else ''
+                elapsed += time.perf_counter() - start
+                if kept:
+                    yield kept
+            start = time.perf_counter()
+            kept = self._filter_lines(pending)
+            elapsed += time.perf_counter() - start
+            if kept:
+                yield kept
+        finally:
+            observe_stage('dedup', elapsed)
+
+    def removed_share(self) -> float:
+        """Share of the characters seen so far that were removed."""
+        return self.stats['chars_removed'] / self.stats['chars'] if self.stats['chars'] else 0.0
+
+    def _filter_lines(self, text: str, page: bool = False) -> str:
+        self.stats['chars'] += len(text)
+        lines = text.splitlines(keepends=True)
+        edges = {}  # line number -> positions on the page
+        if page:
+            filled = [number for number, line in enumerate(lines) if line.strip()]
+            if filled:
+                edges.setdefault(filled[0], []).append('first')
+                edges.setdefault(filled[-1], []).append('last')
+        page_edges = set()
+        kept_lines = []
+        changed = False
+        for number, line in enumerate(lines):
+            body = line.rstrip('\r\n')
+            if number in edges and self._is_running_edge(body, edges[number], page_edges):
+                changed = True
+                continue
+            if len(body.strip()) < self.min_chars:
+                kept_lines.append(line)
+                continue
+            pieces = [piece for piece in SENTENCE_PIECE.findall(body) if piece]
+            kept = [piece for piece in pieces if not self._is_duplicate(piece)]
+            if len(kept) == len(pieces):
+                kept_lines.append(line)
+                continue
+            changed = True
+            if any(piece.strip() for piece in kept):
+                kept_lines.append(''.join(kept) + line[len(body):])
+        if page:
+            self._previous_edges = page_edges
+        if not changed:
+            return text
+        filtered = ''.join(kept_lines)
+        self.stats['chars_removed'] += len(text) - len(filtered)
+        return filtered
+
+    def _is_running_edge(self, body: str, positions: List[str], page_edges: set) -> bool:
+        """
+        Check a numbered first or last line of a page against the previous page.
+
+        The line needs a word and a number and no sentence punctuation, and
+        is matched exactly with digits masked, so short footers such as
+        "Page 3 of 10" are caught too. Only the same position on the page
+        directly before counts, so rows of one table are never compared
+        with each other. A line that differs from the previous page's only
+        in its numbers is still removed, e.g. a "Chapter 4" heading that
+        opens the page after one opened by "Chapter 3", which is why the
+        filter is off unless enabled.
+        """
+        unit = body.strip()
+        if unit.endswith(('.', '!', '?')) or not DIGITS.search(unit) or not LETTER.search(unit):
+            return False
+        masked = ' '.join(DIGITS.sub('0', unit.lower()).split())
+        page_edges.update((position, masked) for position in positions)
+        if any((position, masked) in self._previous_edges for position in positions):
+            self.stats['units'] += 1
+            self.stats['units_removed'] += 1
+            return True
+        return False
+
+    def _is_duplicate(self, piece: str) -> bool:
+        """Check one sentence against those seen before, remembering it if it is new."""
+        unit = piece.strip()
+        if len(unit) < self.min_chars:
+            return False
+        self.stats['units'] += 1
+
+        signature = self._signature(unit)
+        if signature is None:
+            return False
+        bands = zip(*[iter(signature)] * BAND_BINS)
+        band_keys = [hash((number, band)) for number, band in enumerate(bands) if band != EMPTY_BAND]
+
+        checked = set()
+        for key in band_keys:
+            candidate = self._bands.get(key)
+            if candidate is not None and candidate not in checked:
+                checked.add(candidate)
+                if self._similarity(signature, candidate) >= self.threshold:
+                    self.stats['units_removed'] += 1
+                    return True
+
+        if len(self._signatures) >= self.max_units * SIGNATURE_BINS:
+            # Start over rather than grow without bound; boilerplate that
+            # keeps repeating is learned again from its next occurrence
+            self._bands.clear()
+            del self._signatures[:]
+        number = len(self._signatures) // SIGNATURE_BINS
+        self._signatures.extend(signature)
+        for key in band_keys:
+            self._bands.setdefault(key, number)
+        return False
+
+    def _signature(self, unit: str) -> Optional[List[int]]:
+        """One-permutation MinHash of the unit's word shingles, or None if it has no words."""
+        words = WORD_PATTERN.findall(unit.lower())
+        if not words:
+            return None
+        word_hashes = list(map(self._word_hashes.__getitem__, words))
+        if len(word_hashes) >= SHINGLE_WORDS:
+            shingles = zip(*(word_hashes[offset:] for offset in range(SHINGLE_WORDS)))
+        else:
+            shingles = [tuple(word_hashes)]
+
+        signature = [EMPTY_BIN] * SIGNATURE_BINS
+        for shingle_hash in map(HASH_MASK.__and__, map(hash, shingles)):
+            value, slot = divmod(shingle_hash, SIGNATURE_BINS)
+            if value < signature[slot]:
+                signature[slot] = value
+        return signature
+
+    def _similarity(self, signature: List[int], unit_number: int) -> float:
+        """Estimated Jaccard similarity, counting only bins filled in either signature."""
+        start = unit_number * SIGNATURE_BINS
+        other = self._signatures[start:start + SIGNATURE_BINS]
+        filled = matches = 0
+        for value, other_value in zip(signature, other):
+            if value != EMPTY_BIN or other_value != EMPTY_BIN:
+                filled += 1
+                matches += value == other_value
+        return matches / filled if filled else 0.0
@@ -1,51 +1,254 @@
+import io
 import os
+import mmap
+import time
+import codecs
+import tempfile
 import logging
-from typing import Optional
-try:
+import threading
+import importlib.util
+import multiprocessing
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Iterator, List, Union, BinaryIO
+from metrics import timed, timed_iter
+
+# The PDF and DOCX backends take most of the start-up time, so they are
+# only located here and imported on first use or by preload_backends()
+PYMUPDF_AVAILABLE = importlib.util.find_spec('fitz') is not None
+DOCX_AVAILABLE = importlib.util.find_spec('docx') is not None
+
+logger = logging.getLogger(__name__)
+
+# A document can be given as a file path, raw bytes or a binary stream
+DocumentSource = Union[str, bytes, bytearray, memoryview, BinaryIO]
+
+# PDFs with fewer pages than this are always extracted in-process
+PARALLEL_MIN_PAGES = 32
+
+# Worker processes are started from a clean server process: forking the
+# app itself, which runs request, search and batch threads, could copy a
+# lock held by one of them into a child that then deadlocks on it
+POOL_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+# Leading bytes of a text file checked to choose its encoding
+ENCODING_SNIFF_BYTES = 64 * 1024
+
+# Text files at least this large are memory-mapped instead of read
+TXT_MMAP_MIN_BYTES = 1024 * 1024
+
+# Bytes of a text file decoded per chunk when streaming
+TXT_CHUNK_BYTES = 1024 * 1024
+
+# Byte order marks; UTF-32 LE must be checked before UTF-16 LE, which it starts with
+BOMS = (
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+)
+
+
+def detect_encoding(data) -> tuple:
+    """
+    Choose the encoding of text file content from its leading bytes.
+    
+    A byte order mark decides the encoding outright. Otherwise the first
+    ``ENCODING_SNIFF_BYTES`` are checked as UTF-8, falling back to Latin-1,
+    which accepts any byte sequence. Files no larger than the sniff window
+    are checked in full.
+    
+    Args:
+        data: File content as a bytes-like object
+        
+    Returns:
+        Tuple of (codec name, length of the byte order mark to skip)
+    """
+    for bom, encoding in BOMS:
+        if data[:len(bom)] == bom:
+            return encoding, len(bom)
+    
+    try:
+        # A multi-byte character cut off by the window is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(data[:ENCODING_SNIFF_BYTES],
+                                                       final=len(data) <= ENCODING_SNIFF_BYTES)
+        return 'utf-8', 0
+    except UnicodeDecodeError:
+        return 'latin-1', 0
+
+
+def _fitz():
+    """The PyMuPDF module, imported on first use."""
     import fitz  # PyMuPDF
-    PYMUPDF_AVAILABLE = True
-except ImportError:
-    PYMUPDF_AVAILABLE = False
+    return fitz
+
 
-try:
+def _open_docx(source):
+    """Open a DOCX document with python-docx, imported on first use."""
     from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
+    return Document(source)
+
+
+def preload_backends():
+    """Import every installed document backend now, e.g. in a server process before it forks workers."""
+    if PYMUPDF_AVAILABLE:
+        _fitz()
+    if DOCX_AVAILABLE:
+        import docx  # noqa: F401
+
+
+class _ExtractionClock:
+    """
+    Time spent extracting one document, against the per-document timeout.
+
+    The clock is paused while the extracted text is handed to the caller,
+    so slow consumers (tokenizing, a streaming client) do not count.
+    """
+
+    def __init__(self, timeout: Optional[float]):
+        self.timeout = timeout
+        self._spent = 0.0
+        self._resumed = time.monotonic()
+
+    def remaining(self) -> Optional[float]:
+        """Seconds left, or None without a timeout."""
+        if not self.timeout:
+            return None
+        return max(0.0, self.timeout - self._spent - (time.monotonic() - self._resumed))
+
+    def check(self):
+        """Raise TimeoutError once the time allowed has been used up."""
+        if self.remaining() == 0.0:
+            raise self.expired()
+
+    def expired(self) -> TimeoutError:
+        """The error raised when the time allowed is used up."""
+        return TimeoutError(f"Extraction took longer than {self.timeout:g} seconds")
+
+    @contextmanager
+    def paused(self):
+        """Stop the clock while the caller holds control, e.g. around a ``yield``."""
+        self._spent += time.monotonic() - self._resumed
+        try:
+            yield
+        finally:
+            self._resumed = time.monotonic()
+
+
+def _extract_pdf_page_range(filepath: str, start: int, end: int) -> List[str]:
+    """Extract the text of pages [start, end) of a PDF; runs inside pool worker processes."""
+    doc = _fitz().open(filepath)
+    try:
+        return [doc.load_page(page_num).get_text() + "\n" for page_num in range(start, end)]
+    finally:
+        doc.close()
+
+
+def _docx_paragraph_text(doc) -> str:
+    """Text of all non-empty DOCX paragraphs, one per line."""
+    return "".join(paragraph.text + "\n" for paragraph in doc.paragraphs if paragraph.text.strip())
+
+
+def _docx_table_text(doc) -> str:
+    """Text of all DOCX table rows, one row per line."""
+    return "".join("".join(cell.text + " " for cell in row.cells if cell.text.strip()) + "\n"
+                   for table in doc.tables for row in table.rows)
 
-logger = logging.getLogger(__name__)
 
 class DocumentProcessor:
     """Handle document processing and text extraction."""
     
-    def __init__(self):
-        """Initialize the document processor."""
-        pass
+    def __init__(self, workers: int = 1, timeout: Optional[float] = None, spool_dir: Optional[str] = None):
+        """
+        Initialize the document processor.
+        
+        Args:
+            workers: Worker processes used to extract large PDFs; 1 extracts in-process
+            timeout: Seconds allowed for extracting a single document, or None for no limit.
+                Only time spent extracting counts, not time the caller takes to consume
+                the text. In-process extraction checks it between pages, paragraphs and TXT chunks,
+                so a single huge page can overrun it; a PDF that overruns it on the process
+                pool has its worker processes killed so later uploads are not stuck behind it.
+            spool_dir: Directory for temporary copies of in-memory PDFs split across the
+                process pool, or None for the system default
+        """
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.spool_dir = spool_dir
+        self._process_pool = None
+        self._thread_pool = None
+        self._pool_lock = threading.Lock()  # held while a pool is created or dropped
+    
+    def close(self):
+        """Shut down any worker pools."""
+        with self._pool_lock:
+            process_pool, self._process_pool = self._process_pool, None
+            thread_pool, self._thread_pool = self._thread_pool, None
+        if process_pool is not None:
+            process_pool.shutdown(cancel_futures=True)
+        if thread_pool is not None:
+            thread_pool.shutdown(cancel_futures=True)
+    
+    def _discard_process_pool(self, pool: ProcessPoolExecutor):
+        """
+        Kill a process pool after a timeout; the next PDF starts a fresh one.
+        
+        Cancelling futures cannot stop page ranges that are already being
+        decoded, so the workers are terminated. Other documents extracting on
+        the same pool at that moment fail as well.
+        """
+        with self._pool_lock:
+            if self._process_pool is pool:
+                self._process_pool = None
+        # ProcessPoolExecutor has no public way to stop running tasks. Its
+        # futures are left to fail as the pool breaks: cancelling them at
+        # the same time trips the pool's own cleanup on Python 3.11.
+        processes = list((pool._processes or {}).values())
+        pool.shutdown(wait=False)
+        for process in processes:
+            process.terminate()
     
-    def extract_text(self, filepath: str) -> Optional[str]:
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context(POOL_START_METHOD))
+            return self._process_pool
+    
+    def _get_thread_pool(self) -> ThreadPoolExecutor:
+        with self._pool_lock:
+            if self._thread_pool is None:
+                self._thread_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="docx-extract")
+            return self._thread_pool
+    
+    @timed('extract')
+    def extract_text(self, source: DocumentSource, filename: Optional[str] = None) -> Optional[str]:
         """
         Extract text from various document formats.
         
         Args:
-            filepath: Path to the document file
+            source: Path to the document file, its raw bytes, or a binary file-like object
+            filename: Original file name; required to detect the format of bytes and streams
             
         Returns:
             Extracted text or None if extraction fails
         """
+        name = self._source_name(source, filename)
         try:
-            file_extension = os.path.splitext(filepath)[1].lower()
+            file_extension = os.path.splitext(name)[1].lower()
             
             if file_extension == '.txt':
-                return self._extract_from_txt(filepath)
+                return self._extract_from_txt(source)
             elif file_extension == '.pdf':
                 if PYMUPDF_AVAILABLE:
-                    return self._extract_from_pdf(filepath)
+                    return self._extract_from_pdf(source)
                 else:
                     logger.error("PDF processing not available - PyMuPDF not installed")
                     return None
             elif file_extension == '.docx':
                 if DOCX_AVAILABLE:
-                    return self._extract_from_docx(filepath)
+                    return self._extract_from_docx(source)
                 else:
                     logger.error("DOCX processing not available - python-docx not installed")
                     return None
@@ -54,81 +257,262 @@ class DocumentProcessor:
                 return None
                 
         except Exception as e:
-            logger.error(f"Error extracting text from {filepath}: {str(e)}")
+            logger.error(f"Error extracting text from {name}: {str(e)}")
             return None
     
-    def _extract_from_txt(self, filepath: str) -> Optional[str]:
+    @staticmethod
+    def _source_name(source: DocumentSource, filename: Optional[str]) -> str:
+        """Name used for format detection and log messages."""
+        if filename:
+            return filename
+        if isinstance(source, str):
+            return source
+        return getattr(source, 'name', None) or '<memory>'
+    
+    @staticmethod
+    def _read_bytes(source: DocumentSource):
+        """Return in-memory content as a bytes-like object, reading streams once."""
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            return source
+        return source.read()
+    
+    def _extract_from_txt(self, source: DocumentSource) -> Optional[str]:
         """Extract text from TXT file."""
+        name = self._source_name(source, None)
         try:
-            # Try different encodings
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'iso-8859-1']
-            
-            for encoding in encodings:
-                try:
-                    with open(filepath, 'r', encoding=encoding) as file:
-                        text = file.read()
-                        if text.strip():
-                            return text
-                except UnicodeDecodeError:
-                    continue
+            # One chunk covering the whole file decodes it in a single call
+            text = "".join(self._iter_txt_chunks(source, chunk_bytes=None))
+            if text.strip():
+                return text
             
-            logger.error(f"Could not decode text file with any encoding: {filepath}")
+            logger.error(f"No text found in text file: {name}")
             return None
             
         except Exception as e:
-            logger.error(f"Error reading TXT file {filepath}: {str(e)}")
+            logger.error(f"Error reading TXT file {name}: {str(e)}")
             return None
     
-    def _extract_from_pdf(self, filepath: str) -> Optional[str]:
-        """Extract text from PDF file using PyMuPDF."""
-        try:
-            text = ""
-            doc = fitz.open(filepath)
+    @contextmanager
+    def _txt_buffer(self, source: DocumentSource):
+        """Give TXT content as a memoryview, memory-mapping large files instead of reading them."""
+        if not isinstance(source, str):
+            with memoryview(self._read_bytes(source)) as view:
+                yield view
+            return
+        
+        with open(source, 'rb') as file:
+            if os.fstat(file.fileno()).st_size < TXT_MMAP_MIN_BYTES:
+                with memoryview(file.read()) as view:
+                    yield view
+                return
             
-            for page_num in range(len(doc)):
-                page = doc.load_page(page_num)
-                page_text = page.get_text()
-                text += page_text + "\n"
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                # The view must be released before the map can be closed
+                with memoryview(mapped) as view:
+                    yield view
+    
+    def _iter_txt_chunks(self, source: DocumentSource, chunk_bytes: Optional[int] = TXT_CHUNK_BYTES) -> Iterator[str]:
+        """
+        Decode TXT content in a single pass, yielding text chunk by chunk.
+        
+        The encoding is detected once from the leading bytes. Line endings are
+        normalized to newlines as text-mode file reads do, including CRLF
+        pairs split across chunks. If the sniffed window was valid UTF-8,
+        invalid bytes further on are replaced rather than restarting the
+        decode as Latin-1.
+        
+        Args:
+            source: Path to the text file, its raw bytes, or a binary file-like object
+            chunk_bytes: Bytes decoded per chunk, or None to decode everything at once
             
+        Yields:
+            Consecutive chunks of decoded text
+        """
+        clock = _ExtractionClock(self.timeout)
+        with self._txt_buffer(source) as data:
+            encoding, start = detect_encoding(data)
+            decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(errors='replace'),
+                                                   translate=True)
+            step = chunk_bytes or max(1, len(data) - start)
+            for position in range(start, len(data), step):
+                text = decoder.decode(data[position:position + step], final=position + step >= len(data))
+                clock.check()
+                if text:
+                    with clock.paused():
+                        yield text
+    
+    def iter_text(self, source: DocumentSource, filename: Optional[str] = None) -> Iterator[str]:
+        """
+        Stream text from a document as it is decoded.
+        
+        PDF files yield one page at a time and DOCX files one paragraph or
+        table row at a time, so only the current piece has to be held in
+        memory. Joining the pieces gives the same text ``extract_text``
+        returns before stripping.
+        
+        Args:
+            source: Path to the document file, its raw bytes, or a binary file-like object
+            filename: Original file name; required to detect the format of bytes and streams
+            
+        Yields:
+            Consecutive chunks of extracted text
+        """
+        return timed_iter('extract', self._iter_text(source, filename))
+    
+    def _iter_text(self, source: DocumentSource, filename: Optional[str]) -> Iterator[str]:
+        file_extension = os.path.splitext(self._source_name(source, filename))[1].lower()
+        
+        if file_extension == '.txt':
+            yield from self._iter_txt_chunks(source)
+        elif file_extension == '.pdf':
+            if PYMUPDF_AVAILABLE:
+                yield from self._iter_pdf_pages(source)
+            else:
+                logger.error("PDF processing not available - PyMuPDF not installed")
+        elif file_extension == '.docx':
+            if DOCX_AVAILABLE:
+                yield from self._iter_docx_blocks(source)
+            else:
+                logger.error("DOCX processing not available - python-docx not installed")
+        else:
+            logger.error(f"Unsupported file format: {file_extension}")
+    
+    def _iter_pdf_pages(self, source: DocumentSource) -> Iterator[str]:
+        """Yield the text of each PDF page, followed by a newline."""
+        clock = _ExtractionClock(self.timeout)
+        fitz = _fitz()
+        data = None
+        if isinstance(source, str):
+            doc = fitz.open(source)
+        else:
+            # PyMuPDF reads straight from the memory buffer
+            data = self._read_bytes(source)
+            doc = fitz.open(stream=data, filetype='pdf')
+        
+        page_count = len(doc)
+        if self.workers > 1 and page_count >= PARALLEL_MIN_PAGES:
+            doc.close()
+            if data is None:
+                yield from self._iter_pdf_page_ranges(source, page_count)
+                return
+            # Worker processes open the file themselves, so an in-memory PDF
+            # is written to a temporary file that is removed afterwards
+            with tempfile.NamedTemporaryFile(suffix='.pdf', dir=self.spool_dir) as spooled:
+                spooled.write(data)
+                spooled.flush()
+                yield from self._iter_pdf_page_ranges(spooled.name, page_count)
+            return
+        
+        try:
+            for page_num in range(page_count):
+                clock.check()
+                text = doc.load_page(page_num).get_text() + "\n"
+                with clock.paused():
+                    yield text
+        finally:
             doc.close()
+    
+    def _iter_pdf_page_ranges(self, filepath: str, page_count: int) -> Iterator[str]:
+        """
+        Extract page ranges on the process pool and yield their pages in order.
+        
+        Ranges are small relative to the pool so that early pages are yielded
+        while later ones are still being decoded.
+        """
+        range_size = max(1, -(-page_count // (self.workers * 4)))
+        pool = self._get_process_pool()
+        futures = [pool.submit(_extract_pdf_page_range, filepath, start, min(start + range_size, page_count))
+                   for start in range(0, page_count, range_size)]
+        for pages in self._results_in_order(futures, on_timeout=lambda: self._discard_process_pool(pool)):
+            yield from pages
+    
+    def _results_in_order(self, futures: List, on_timeout=None) -> Iterator[str]:
+        """
+        Yield future results in submission order within the per-document timeout.
+        
+        Args:
+            futures: Futures in document order
+            on_timeout: Called before the timeout error is raised, e.g. to free a stuck pool;
+                the remaining futures are then left to it rather than cancelled
+        """
+        clock = _ExtractionClock(self.timeout)
+        timed_out = False
+        try:
+            for future in futures:
+                try:
+                    result = future.result(timeout=clock.remaining())
+                except TimeoutError:
+                    if on_timeout is not None:
+                        timed_out = True
+                        on_timeout()
+                    raise clock.expired() from None
+                with clock.paused():
+                    yield result
+        finally:
+            if not timed_out:
+                for future in futures:
+                    future.cancel()
+    
+    def _iter_docx_blocks(self, source: DocumentSource) -> Iterator[str]:
+        """Yield DOCX paragraphs, then table rows, each followed by a newline."""
+        clock = _ExtractionClock(self.timeout)
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            source = io.BytesIO(source)
+        doc = _open_docx(source)
+        
+        if self.workers > 1:
+            # Walk paragraphs and tables concurrently, keeping their order; a
+            # thread cannot be stopped, so on timeout it finishes unobserved
+            pool = self._get_thread_pool()
+            yield from self._results_in_order([pool.submit(_docx_paragraph_text, doc),
+                                               pool.submit(_docx_table_text, doc)])
+            return
+        
+        # Extract text from paragraphs
+        for paragraph in doc.paragraphs:
+            clock.check()
+            if paragraph.text.strip():
+                with clock.paused():
+                    yield paragraph.text + "\n"
+        
+        # Extract text from tables
+        for table in doc.tables:
+            for row in table.rows:
+                clock.check()
+                text = "".join(cell.text + " " for cell in row.cells if cell.text.strip()) + "\n"
+                with clock.paused():
+                    yield text
+    
+    def _extract_from_pdf(self, source: DocumentSource) -> Optional[str]:
+        """Extract text from PDF file using PyMuPDF."""
+        name = self._source_name(source, None)
+        try:
+            text = "".join(self._iter_pdf_pages(source))
             
             if text.strip():
                 return text.strip()
             else:
-                logger.warning(f"No text extracted from PDF: {filepath}")
+                logger.warning(f"No text extracted from PDF: {name}")
                 return None
                 
         except Exception as e:
-            logger.error(f"Error reading PDF file {filepath}: {str(e)}")
+            logger.error(f"Error reading PDF file {name}: {str(e)}")
             return None
     
-    def _extract_from_docx(self, filepath: str) -> Optional[str]:
+    def _extract_from_docx(self, source: DocumentSource) -> Optional[str]:
         """Extract text from DOCX file."""
+        name = self._source_name(source, None)
         try:
-            doc = Document(filepath)
-            text = ""
-            
-            # Extract text from paragraphs
-            for paragraph in doc.paragraphs:
-                if paragraph.text.strip():
-                    text += paragraph.text + "\n"
-            
-            # Extract text from tables
-            for table in doc.tables:
-                for row in table.rows:
-                    for cell in row.cells:
-                        if cell.text.strip():
-                            text += cell.text + " "
-                    text += "\n"
+            text = "".join(self._iter_docx_blocks(source))
             
             if text.strip():
                 return text.strip()
             else:
-                logger.warning(f"No text extracted from DOCX: {filepath}")
+                logger.warning(f"No text extracted from DOCX: {name}")
                 return None
                 
         except Exception as e:
-            logger.error(f"Error reading DOCX file {filepath}: {str(e)}")
+            logger.error(f"Error reading DOCX file {name}: {str(e)}")
             return None
     
     def clean_text(self, text: str) -> str:
@@ -0,0 +1,250 @@
+import re
+import sys
+import time
+import uuid
+import logging
+import threading
+from typing import Optional, Dict
+from collections import OrderedDict
+from sentence_index import SentenceIndex
+from tokenizer import TokenizedDocument
+from content_cache import content_hasher
+
+logger = logging.getLogger(__name__)
+
+
+class ProcessedDocument:
+    """Pre-processed view of a document that summarization and Q&A can reuse."""
+
+    def __init__(self, tokens: TokenizedDocument):
+        """
+        Initialize the processed document.
+
+        Args:
+            tokens: Single-pass tokenization of the document text
+        """
+        self.tokens = tokens
+        self.text = tokens.text
+        self._index = None  # built on first question; summaries never need it
+        self.scorer = None  # built by AIModels on first summary
+        self.incremental_scorer = None  # built by AIModels on first append
+        self.lock = threading.Lock()  # held while the document is read or extended
+        self._content_hash = None
+        self._hasher = None
+        self._word_count = None
+        self.char_count = len(self.text)
+        self._terms_bytes = 0
+        self._terms_sized = 0
+        self.size_bytes = self._estimate_size()
+
+    @property
+    def index(self) -> SentenceIndex:
+        """Inverted sentence index, built on first use; the caller must hold the lock."""
+        if self._index is None:
+            self._index = SentenceIndex(self.tokens)
+        return self._index
+
+    @property
+    def word_count(self) -> int:
+        """Number of whitespace-separated words, counted on first use."""
+        if self._word_count is None:
+            self._word_count = sum(1 for _ in re.finditer(r'\S+', self.text))
+        return self._word_count
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of sentences kept for ranking."""
+        return self.tokens.sentence_count
+
+    def sentence(self, sentence_id: int) -> str:
+        """Materialize one sentence."""
+        return self.tokens.sentence(sentence_id)
+
+    @property
+    def content_hash(self) -> str:
+        """SHA-256 of the document text, computed on first use."""
+        if self._content_hash is None:
+            if self._hasher is None:
+                self._hasher = content_hasher(self.text)
+            self._content_hash = self._hasher.hexdigest()
+        return self._content_hash
+
+    @property
+    def content_key(self) -> str:
+        """Cache key of the current text, its hash and length; the caller must hold the lock."""
+        return f"{self.content_hash}:{self.char_count}"
+
+    def append(self, text: str):
+        """
+        Append text to the document in place.
+
+        Only the trailing sentence and the new text are tokenized and
+        indexed; the incremental scorer and content hash, if already
+        built, are updated from the new text alone.
+
+        Args:
+            text: Text that directly follows the current text
+        """
+        if not text:
+            return
+
+        ends_in_word = bool(self.text[-1:].strip()) and bool(text[:1].strip())
+        first_sentence_id, changes = self.tokens.extend(text)
+        if self._index is not None:
+            self._index.extend(self.tokens, first_sentence_id, changes.keys())
+        if self.incremental_scorer is not None:
+            self.incremental_scorer.update(first_sentence_id, changes)
+        self.scorer = None
+
+        self.text = self.tokens.text
+        if self._hasher is not None:
+            self._hasher.update(text.encode('utf-8', 'surrogatepass'))
+        self._content_hash = None
+        if self._word_count is not None:
+            # A word cut off at the old end continues in the new text
+            self._word_count += sum(1 for _ in re.finditer(r'\S+', text)) - ends_in_word
+        self.char_count = len(self.text)
+        self.size_bytes = self._estimate_size()
+
+    def _estimate_size(self) -> int:
+        """Roughly estimate the memory held by this document in bytes."""
+        tokens = self.tokens
+        # Terms are never removed, so only those added since the last estimate are measured
+        self._terms_bytes += sum(sys.getsizeof(term) + 100 for term in tokens.terms[self._terms_sized:])
+        self._terms_sized = len(tokens.terms)
+        size = sys.getsizeof(self.text) + self._terms_bytes
+        size += sum(buffer.buffer_info()[1] * buffer.itemsize for buffer in (
+            tokens.term_counts, tokens.token_ids, tokens.token_offsets,
+            tokens.sentence_starts, tokens.sentence_ends))
+        # Index postings: a pair of arrays per term, 8 bytes per distinct term
+        # per sentence. An index not built yet is counted as one posting per
+        # token, so the size does not jump once the first question builds it.
+        if self._index is None:
+            size += 200 * len(tokens.terms) + 9 * len(tokens.token_ids) + 4 * tokens.sentence_count
+        else:
+            size += 200 * len(self._index.postings) + 9 * self._index.posting_count
+            size += self._index.sentence_lengths.buffer_info()[1] * self._index.sentence_lengths.itemsize
+        return size
+
+
+class DocumentStore:
+    """Thread-safe in-memory store of processed documents with LRU/TTL eviction."""
+
+    def __init__(self, max_documents: int = 64, max_bytes: int = 256 * 1024 * 1024,
+                 ttl_seconds: float = 3600):
+        """
+        Initialize the document store.
+
+        Args:
+            max_documents: Maximum number of documents kept at once
+            max_bytes: Memory cap for all stored documents combined
+            ttl_seconds: Seconds a document may stay unused before it expires
+        """
+        self.max_documents = max_documents
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._documents = OrderedDict()  # document_id -> (document, last_access)
+        self._sizes: Dict[str, int] = {}  # document_id -> bytes accounted for it
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def put(self, document: ProcessedDocument) -> Optional[str]:
+        """
+        Store a processed document.
+
+        Args:
+            document: Document to store
+
+        Returns:
+            New document id, or None if the document alone exceeds the memory cap
+        """
+        if document.size_bytes > self.max_bytes:
+            logger.warning(f"Document of ~{document.size_bytes} bytes exceeds store cap, not storing")
+            return None
+
+        document_id = uuid.uuid4().hex
+        with self._lock:
+            self._documents[document_id] = (document, time.monotonic())
+            self._sizes[document_id] = document.size_bytes
+            self._total_bytes += document.size_bytes
+            self._evict()
+        return document_id
+
+    def resize(self, document_id: str):
+        """
+        Update the memory accounted for a stored document that grew or shrank.
+
+        Args:
+            document_id: Id returned by ``put``
+        """
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is None:
+                return
+            document, _ = entry
+            self._total_bytes += document.size_bytes - self._sizes[document_id]
+            self._sizes[document_id] = document.size_bytes
+            self._evict()
+
+    def get(self, document_id: str) -> Optional[ProcessedDocument]:
+        """
+        Fetch a stored document and mark it as recently used.
+
+        Args:
+            document_id: Id returned by ``put``
+
+        Returns:
+            The document, or None if it is unknown or has expired
+        """
+        with self._lock:
+            entry = self._documents.get(document_id)
+            if entry is None:
+                return None
+
+            document, last_access = entry
+            now = time.monotonic()
+            if now - last_access > self.ttl_seconds:
+                self._remove(document_id)
+                return None
+
+            self._documents[document_id] = (document, now)
+            self._documents.move_to_end(document_id)
+            return document
+
+    def delete(self, document_id: str) -> bool:
+        """Remove a document from the store. Returns True if it was present."""
+        with self._lock:
+            if document_id not in self._documents:
+                return False
+            self._remove(document_id)
+            return True
+
+    def stats(self) -> Dict[str, int]:
+        """Return the current number of documents and bytes held."""
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'bytes': self._total_bytes
+            }
+
+    def __len__(self) -> int:
+        return len(self._documents)
+
+    def _remove(self, document_id: str):
+        """Drop a document; the caller must hold the lock."""
+        del self._documents[document_id]
+        self._total_bytes -= self._sizes.pop(document_id)
+
+    def _evict(self):
+        """Drop expired entries, then least recently used ones until within limits."""
+        now = time.monotonic()
+        expired = [doc_id for doc_id, (_, last_access) in self._documents.items()
+                   if now - last_access > self.ttl_seconds]
+        for doc_id in expired:
+            self._remove(doc_id)
+
+        while self._documents and (len(self._documents) > self.max_documents or
+                                   self._total_bytes > self.max_bytes):
+            oldest_id = next(iter(self._documents))
+            logger.debug(f"Evicting document {oldest_id} from store")
+            self._remove(oldest_id)
@@ -0,0 +1,44 @@
+"""
+Production server settings, read by ``gunicorn main:app`` from this directory.
+
+The app is loaded once in the master process and workers are forked from
+it, so imported modules, compiled patterns and the app object are shared
+copy-on-write instead of being rebuilt per worker. Documents, jobs and
+caches held in memory are still per worker: with more than one worker,
+follow-up calls that pass a document_id or job_id need sticky sessions,
+so the default is a single worker that serves requests on threads.
+
+Environment variables:
+    PORT                  port to listen on (5000)
+    GUNICORN_WORKERS      worker processes (1)
+    GUNICORN_THREADS      request threads per worker (8)
+    GUNICORN_TIMEOUT      seconds a request may run before its worker is restarted (120)
+    PRELOAD_BACKENDS      import the PDF and DOCX backends before forking, 0 to import them lazily (1)
+"""
+import os
+import gc
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+threads = int(os.environ.get("GUNICORN_THREADS", 8))
+worker_class = "gthread"
+timeout = int(os.environ.get("GUNICORN_TIMEOUT", 120))
+preload_app = True
+accesslog = "-"
+
+
+def when_ready(server):
+    """Runs in the master after the app is loaded and before any worker is forked."""
+    if os.environ.get("PRELOAD_BACKENDS", "1") != "0":
+        from document_processor import preload_backends
+        preload_backends()
+    # Move everything loaded so far out of the collector's reach, so
+    # collections in the workers do not write to, and un-share, its pages
+    gc.collect()
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Give each worker its own database connections."""
+    from app import reopen_after_fork
+    reopen_after_fork()
@@ -0,0 +1,140 @@
+import time
+import uuid
+import logging
+import threading
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Callable, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at its depth limit."""
+
+
+class Job:
+    """A unit of background work and its progress."""
+
+    def __init__(self, kind: str):
+        """
+        Initialize the job.
+
+        Args:
+            kind: What the job does, e.g. 'upload' or 'summarize'
+        """
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = 'queued'  # queued, running, done, failed
+        self.progress: Dict[str, Any] = {}
+        self.result: Optional[Tuple[dict, int]] = None  # (payload, HTTP status)
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+
+    def update_progress(self, **progress):
+        """Record progress, e.g. ``job.update_progress(stage='extracting', chunks_extracted=3)``."""
+        self.progress.update(progress)
+
+    def to_dict(self) -> dict:
+        """Describe the job for the status endpoint."""
+        return {
+            'job_id': self.id,
+            'kind': self.kind,
+            'status': self.status,
+            'progress': dict(self.progress),
+            'error': self.error,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at
+        }
+
+
+class JobQueue:
+    """Bounded background executor for long-running requests."""
+
+    def __init__(self, workers: int = 2, max_depth: int = 16, ttl_seconds: float = 3600,
+                 max_finished: int = 256):
+        """
+        Initialize the job queue.
+
+        Args:
+            workers: Threads that run jobs
+            max_depth: Maximum number of queued plus running jobs before submissions are refused
+            ttl_seconds: How long finished jobs and their results are kept
+            max_finished: Maximum number of finished jobs kept; the oldest are forgotten first
+        """
+        self.max_depth = max_depth
+        self.ttl_seconds = ttl_seconds
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="job")
+        self._jobs: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, None]" = OrderedDict()  # finished job ids, oldest first
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, fn: Callable[..., Tuple[dict, int]], *args) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kind: What the job does
+            fn: Callable run as ``fn(job, *args)``; returns (payload, HTTP status)
+            *args: Extra arguments for ``fn``
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: If the queue is at its depth limit
+        """
+        with self._lock:
+            self._prune()
+            if self._active >= self.max_depth:
+                raise QueueFullError(f"Job queue is full ({self._active} jobs pending)")
+            job = Job(kind)
+            self._jobs[job.id] = job
+            self._active += 1
+
+        self._executor.submit(self._run, job, fn, args)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def depth(self) -> int:
+        """Number of queued plus running jobs."""
+        return self._active
+
+    def shutdown(self):
+        """Stop accepting work and wait for running jobs."""
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: Job, fn: Callable, args: tuple):
+        job.status = 'running'
+        try:
+            job.result = fn(job, *args)
+            job.status = 'done'
+        except Exception as e:
+            logger.error(f"Job {job.id} ({job.kind}) failed: {str(e)}")
+            logger.error(traceback.format_exc())
+            job.error = str(e)
+            job.status = 'failed'
+        finally:
+            job.finished_at = time.time()
+            with self._lock:
+                self._active -= 1
+                self._finished[job.id] = None
+                self._prune()
+
+    def _prune(self):
+        """Forget finished jobs older than the TTL or beyond the count limit; the caller must hold the lock."""
+        cutoff = time.time() - self.ttl_seconds
+        while self._finished:
+            job_id = next(iter(self._finished))
+            if len(self._finished) <= self.max_finished and self._jobs[job_id].finished_at >= cutoff:
+                break
+            del self._finished[job_id]
+            del self._jobs[job_id]
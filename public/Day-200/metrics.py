@@ -0,0 +1,229 @@
+import time
+import logging
+import threading
+import functools
+from bisect import bisect_left
+from contextlib import nullcontext
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Latency buckets in seconds, from sub-millisecond scoring to slow extractions
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+STAGE_METRIC = 'stage_duration_seconds'
+STAGE_HELP = 'Time spent in each processing stage'
+
+# Shared no-op context returned while metrics are disabled
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize the histogram.
+
+        Args:
+            buckets: Sorted upper bounds; an implicit +Inf bucket is added
+        """
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self) -> Tuple[List[int], float, int]:
+        """Return (cumulative bucket counts, sum, count)."""
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = []
+        running = 0
+        for bucket_count in counts:
+            running += bucket_count
+            cumulative.append(running)
+        return cumulative, total, count
+
+
+class MetricsRegistry:
+    """
+    Process-wide store of latency histograms plus callbacks for point-in-time values.
+
+    Collectors are called on every scrape and return samples as
+    ``(name, type, help, labels, value)`` tuples, so gauges such as queue
+    depth or cache hit counts cost nothing between scrapes.
+    """
+
+    def __init__(self, enabled: bool = True):
+        """
+        Initialize the registry.
+
+        Args:
+            enabled: Record observations; when False, timers are no-ops
+        """
+        self.enabled = enabled
+        self._histograms: Dict[Tuple[str, Tuple], Histogram] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Callable[[], Iterable[tuple]]] = []
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, help_text: str = '', **labels):
+        """
+        Record a value in the histogram ``name`` with the given labels.
+
+        Args:
+            name: Metric name
+            value: Observed value, usually seconds
+            help_text: Description shown in the exposition output
+            **labels: Label values identifying the series
+        """
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram())
+                self._help.setdefault(name, help_text)
+        histogram.observe(value)
+
+    def register_collector(self, collector: Callable[[], Iterable[tuple]]):
+        """Add a callback that yields ``(name, type, help, labels, value)`` samples at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            help_texts = dict(self._help)
+
+        current = None
+        for (name, labels), histogram in histograms:
+            if name != current:
+                lines.append(f"# HELP {name} {help_texts.get(name, '')}")
+                lines.append(f"# TYPE {name} histogram")
+                current = name
+            cumulative, total, count = histogram.snapshot()
+            for bound, bucket_count in zip(histogram.buckets + (float('inf'),), cumulative):
+                le = '+Inf' if bound == float('inf') else repr(bound)
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', le),))} {bucket_count}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {total!r}")
+            lines.append(f"{name}_count{_format_labels(labels)} {count}")
+
+        # Samples of one metric must be listed together, whichever collector produced them
+        families: Dict[str, List[str]] = {}
+        for collector in self._collectors:
+            try:
+                samples = list(collector())
+            except Exception as e:
+                logger.error(f"Error collecting metrics: {str(e)}")
+                continue
+            for name, metric_type, help_text, labels, value in samples:
+                if name not in families:
+                    families[name] = [f"# HELP {name} {help_text}", f"# TYPE {name} {metric_type}"]
+                families[name].append(f"{name}{_format_labels(tuple(sorted(labels.items())))} {value!r}")
+        for family in families.values():
+            lines.extend(family)
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels: Tuple) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+# Registry used by the application and its processing modules
+registry = MetricsRegistry()
+
+
+class _StageTimer:
+    __slots__ = ('stage', 'start')
+
+    def __init__(self, stage: str):
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe_stage(self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def observe_stage(stage: str, seconds: float):
+    """Record time spent in a processing stage."""
+    registry.observe(STAGE_METRIC, seconds, STAGE_HELP, stage=stage)
+
+
+def stage(name: str):
+    """
+    Time a block of code as a processing stage, e.g. ``with stage('score'): ...``.
+
+    Returns a shared no-op context while metrics are disabled.
+    """
+    if not registry.enabled:
+        return _DISABLED
+    return _StageTimer(name)
+
+
+def timed(stage_name: str):
+    """Decorator that times every call of a function as a processing stage."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                observe_stage(stage_name, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def timed_iter(stage_name: str, items: Iterator) -> Iterator:
+    """
+    Pass items through, timing only the work done to produce them.
+
+    Time spent by the consumer between items is not counted; the total is
+    recorded once the iterator is exhausted or closed.
+    """
+    if not registry.enabled:
+        yield from items
+        return
+
+    elapsed = 0.0
+    try:
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(items)
+            except StopIteration:
+                elapsed += time.perf_counter() - start
+                return
+            elapsed += time.perf_counter() - start
+            yield item
+    finally:
+        if hasattr(items, 'close'):
+            items.close()
+        observe_stage(stage_name, elapsed)
+
+
+def set_enabled(enabled: bool):
+    """Turn metric recording on or off for the whole process."""
+    registry.enabled = enabled
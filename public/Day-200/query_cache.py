@@ -0,0 +1,100 @@
+import sys
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+
+
+def query_key(context_key: str, keywords: Iterable[str], question_type: Optional[str], scoring: str) -> Tuple:
+    """
+    Build the cache key of a question asked against one context.
+
+    Keywords are sorted, so questions that differ only in wording, stop
+    words or word order share an entry. Repeated keywords are kept, since
+    every occurrence adds to a sentence's score.
+
+    Args:
+        context_key: Content hash and length of the context
+        keywords: Question keywords
+        question_type: Type from ``answer_extractor.question_type``, or None
+        scoring: Sentence ranking, 'keyword' or 'bm25'
+
+    Returns:
+        Hashable cache key
+    """
+    return context_key, tuple(sorted(keywords)), question_type or '', scoring
+
+
+class QueryCache:
+    """
+    In-memory LRU cache of ranked answer candidates for repeated questions.
+
+    Each entry holds the best matching sentences, best first, for one
+    (context, keyword set, question type, scoring) key. The specific
+    answer is still extracted per question, since it can depend on the
+    order of the question's keywords.
+    """
+
+    def __init__(self, max_items: int = 4096, max_bytes: int = 16 * 1024 * 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_items: Maximum number of cached questions
+            max_bytes: Memory cap for cached sentences
+        """
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (sentences, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'memory_hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key: Tuple) -> Optional[Tuple[str, ...]]:
+        """
+        Look up the ranked candidates of a question.
+
+        Args:
+            key: Key from ``query_key``
+
+        Returns:
+            Candidate sentences, best first (empty when nothing matched), or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['memory_hits'] += 1
+            return entry[0]
+
+    def put(self, key: Tuple, sentences: Tuple[str, ...]):
+        """
+        Store the ranked candidates of a question.
+
+        Args:
+            key: Key from ``query_key``
+            sentences: Candidate sentences, best first
+        """
+        size = sys.getsizeof(sentences) + sum(sys.getsizeof(sentence) for sentence in sentences)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (sentences, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_items or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    def stats(self) -> Dict[str, int]:
+        """Return hit/miss/eviction counters and current memory usage."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['bytes'] = self._bytes
+            return stats
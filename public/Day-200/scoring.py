@@ -0,0 +1,359 @@
+import math
+import heapq
+import logging
+from typing import Dict, List, Optional, Sequence, Set
+from collections import Counter
+from tokenizer import TokenizedDocument
+from sentence_index import SentenceIndex
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# Sentence scoring methods; 'frequency' is the original summarizer behaviour
+SCORING_METHODS = ('frequency', 'tfidf', 'centroid')
+
+
+class SentenceScorer:
+    """
+    Score the sentences of a tokenized document for extractive summarization.
+
+    With NumPy installed the scores are computed with vectorized operations
+    over a sparse sentence x term matrix that is built once per document.
+    Without it the same scores are computed in pure Python.
+    """
+
+    def __init__(self, tokens: TokenizedDocument, stop_words: Set[str], use_numpy: Optional[bool] = None):
+        """
+        Initialize the scorer.
+
+        Args:
+            tokens: Tokenized document
+            stop_words: Terms that never contribute to a score
+            use_numpy: Force the NumPy (True) or pure Python (False) engine; defaults to NumPy when available
+        """
+        self.tokens = tokens
+        self.use_numpy = NUMPY_AVAILABLE if use_numpy is None else (use_numpy and NUMPY_AVAILABLE)
+        self.stop_mask = [term in stop_words for term in tokens.terms]
+        self._matrix = None
+
+    def scores(self, method: str = 'frequency') -> Sequence[float]:
+        """
+        Score every sentence.
+
+        Args:
+            method: 'frequency', 'tfidf' or 'centroid'
+
+        Returns:
+            One score per sentence, in document order
+        """
+        if method not in SCORING_METHODS:
+            raise ValueError(f"Unknown scoring method: {method}")
+
+        if self.use_numpy:
+            return getattr(self, f'_{method}_numpy')()
+        return getattr(self, f'_{method}_python')()
+
+    def top_k(self, k: int, method: str = 'frequency') -> List[int]:
+        """
+        Pick the ``k`` best sentences.
+
+        Ties are broken in favour of the earlier sentence, matching a stable
+        descending sort.
+
+        Args:
+            k: Number of sentences to pick
+            method: Scoring method, see ``scores``
+
+        Returns:
+            Sentence ids of the winners in document order
+        """
+        scores = self.scores(method)
+        count = len(scores)
+        if k >= count:
+            return list(range(count))
+        if k <= 0:
+            return []
+
+        if self.use_numpy:
+            # argpartition finds the k-th largest score without a full sort;
+            # everything above it wins, and ties at it go to the lowest ids.
+            partitioned = np.argpartition(-scores, k - 1)[:k]
+            threshold = scores[partitioned].min()
+            above = np.flatnonzero(scores > threshold)
+            ties = np.flatnonzero(scores == threshold)[:k - len(above)]
+            return sorted(int(i) for i in np.concatenate((above, ties)))
+
+        return sorted(heapq.nlargest(k, range(count), key=lambda i: (scores[i], -i)))
+
+    # -- pure Python engine -------------------------------------------------
+
+    def _sentence_term_counts(self):
+        """Yield (length, Counter of non stop term ids) for each sentence."""
+        tokens = self.tokens
+        stop_mask = self.stop_mask
+        for sentence_id in range(tokens.sentence_count):
+            ids = tokens.sentence_token_ids(sentence_id)
+            yield len(ids), Counter(term_id for term_id in ids if not stop_mask[term_id])
+
+    def _idf_python(self):
+        """Smoothed inverse sentence frequency per term id."""
+        document_frequency = Counter()
+        for _, counts in self._sentence_term_counts():
+            document_frequency.update(counts.keys())
+        total = self.tokens.sentence_count
+        return {term_id: math.log((1 + total) / (1 + df)) + 1 for term_id, df in document_frequency.items()}
+
+    def _frequency_python(self) -> List[float]:
+        tokens = self.tokens
+        weights = [0 if stop else count for stop, count in zip(self.stop_mask, tokens.term_counts)]
+        token_ids = tokens.token_ids
+        offsets = tokens.token_offsets
+        sentence_scores = []
+        for sentence_id in range(tokens.sentence_count):
+            start, end = offsets[sentence_id], offsets[sentence_id + 1]
+            if start == end:
+                sentence_scores.append(0)
+                continue
+            score = sum(weights[term_id] for term_id in token_ids[start:end])
+            # Normalize by sentence length
+            sentence_scores.append(score / (end - start))
+        return sentence_scores
+
+    def _tfidf_python(self) -> List[float]:
+        idf = self._idf_python()
+        return [sum(count * idf[term_id] for term_id, count in counts.items()) / length if length else 0.0
+                for length, counts in self._sentence_term_counts()]
+
+    def _centroid_python(self) -> List[float]:
+        idf = self._idf_python()
+        vectors = [{term_id: count * idf[term_id] for term_id, count in counts.items()}
+                   for _, counts in self._sentence_term_counts()]
+        centroid = Counter()
+        for vector in vectors:
+            centroid.update(vector)
+        centroid_norm = math.sqrt(sum(value * value for value in centroid.values()))
+
+        sentence_scores = []
+        for vector in vectors:
+            norm = math.sqrt(sum(value * value for value in vector.values()))
+            if not norm or not centroid_norm:
+                sentence_scores.append(0.0)
+                continue
+            dot = sum(value * centroid[term_id] for term_id, value in vector.items())
+            sentence_scores.append(dot / (norm * centroid_norm))
+        return sentence_scores
+
+    # -- NumPy engine -------------------------------------------------------
+
+    def _sentence_bounds(self):
+        offsets = np.frombuffer(self.tokens.token_offsets, dtype=np.uint32).astype(np.int64)
+        return offsets[:-1], offsets[1:]
+
+    def _frequency_numpy(self):
+        tokens = self.tokens
+        token_ids = np.frombuffer(tokens.token_ids, dtype=np.uint32)
+        weights = np.frombuffer(tokens.term_counts, dtype=np.uint32).astype(np.int64)
+        weights[np.array(self.stop_mask, dtype=bool)] = 0
+
+        # Integer prefix sums keep the per-sentence totals exact, so the
+        # scores match the pure Python engine bit for bit.
+        cumulative = np.concatenate(([0], np.cumsum(weights[token_ids])))
+        starts, ends = self._sentence_bounds()
+        lengths = ends - starts
+        totals = cumulative[ends] - cumulative[starts]
+        sentence_scores = np.zeros(len(lengths))
+        nonempty = lengths > 0
+        sentence_scores[nonempty] = totals[nonempty] / lengths[nonempty]
+        return sentence_scores
+
+    def _build_matrix(self):
+        """Build the sparse sentence x term count matrix (CSR arrays) of non stop terms."""
+        if self._matrix is not None:
+            return self._matrix
+
+        tokens = self.tokens
+        token_ids = np.frombuffer(tokens.token_ids, dtype=np.uint32).astype(np.int64)
+        starts, ends = self._sentence_bounds()
+        lengths = ends - starts
+        rows = np.repeat(np.arange(len(lengths), dtype=np.int64), lengths)
+
+        keep = ~np.array(self.stop_mask, dtype=bool)[token_ids] if len(token_ids) else np.zeros(0, dtype=bool)
+        vocabulary_size = max(len(tokens.terms), 1)
+        keys, counts = np.unique(rows[keep] * vocabulary_size + token_ids[keep], return_counts=True)
+        self._matrix = (keys // vocabulary_size, keys % vocabulary_size, counts.astype(np.float64), lengths)
+        return self._matrix
+
+    def _tfidf_vectors(self):
+        """Return (rows, cols, tf-idf values, sentence lengths) of the sentence matrix."""
+        rows, cols, counts, lengths = self._build_matrix()
+        sentence_count = len(lengths)
+        document_frequency = np.bincount(cols, minlength=len(self.tokens.terms))
+        idf = np.log((1 + sentence_count) / (1 + document_frequency)) + 1
+        return rows, cols, counts * idf[cols], lengths
+
+    def _tfidf_numpy(self):
+        rows, _, values, lengths = self._tfidf_vectors()
+        totals = np.bincount(rows, weights=values, minlength=len(lengths))
+        sentence_scores = np.zeros(len(lengths))
+        nonempty = lengths > 0
+        sentence_scores[nonempty] = totals[nonempty] / lengths[nonempty]
+        return sentence_scores
+
+    def _centroid_numpy(self):
+        rows, cols, values, lengths = self._tfidf_vectors()
+        sentence_count = len(lengths)
+        centroid = np.bincount(cols, weights=values, minlength=len(self.tokens.terms))
+        centroid_norm = np.sqrt(np.dot(centroid, centroid))
+        dots = np.bincount(rows, weights=values * centroid[cols], minlength=sentence_count)
+        norms = np.sqrt(np.bincount(rows, weights=values * values, minlength=sentence_count))
+
+        sentence_scores = np.zeros(sentence_count)
+        if centroid_norm:
+            nonzero = norms > 0
+            sentence_scores[nonzero] = dots[nonzero] / (norms[nonzero] * centroid_norm)
+        return sentence_scores
+
+
+class IncrementalScorer:
+    """
+    Frequency scores that follow a document as text is appended to it.
+
+    A sentence's frequency score is the sum of the document-wide counts of
+    its non stop terms divided by its length. The integer sums are kept per
+    sentence, so an append only adds the count changes of the terms it
+    touched to the sentences that contain them, found through the sentence
+    index, and scores the new sentences. The best sentences are kept in a
+    small leaderboard that is refreshed from the sentences whose score
+    changed. Scores match ``SentenceScorer`` exactly.
+    """
+
+    def __init__(self, tokens: TokenizedDocument, index: SentenceIndex, stop_words: Set[str],
+                 leaders: int = 6):
+        """
+        Score every sentence of the document once.
+
+        Args:
+            tokens: Tokenized document, later grown with ``TokenizedDocument.extend``
+            index: Sentence index of the document, kept in step with ``tokens``
+            stop_words: Terms that never contribute to a score
+            leaders: Number of best sentences tracked; larger ``top_k`` requests rank all sentences
+        """
+        self.tokens = tokens
+        self.index = index
+        self.stop_words = stop_words
+        self.leader_count = leaders
+        self.stop_mask: List[bool] = []
+        self.totals: List[int] = []  # sentence id -> sum of term weights
+        self._extend_stop_mask()
+        self._add_totals(0)
+        self.leaders = self._rank(range(tokens.sentence_count))
+
+    def update(self, first_sentence_id: int, changes: Dict[int, int]):
+        """
+        Account for text appended with ``TokenizedDocument.extend``.
+
+        Call after the sentence index has been extended.
+
+        Args:
+            first_sentence_id: First sentence that is new or was re-tokenized
+            changes: Term id -> change in occurrences, as returned by ``extend``
+        """
+        self._extend_stop_mask()
+        stop_mask = self.stop_mask
+        totals = self.totals
+        del totals[first_sentence_id:]
+
+        changed = set()
+        decreased = set()
+        for term_id, change in changes.items():
+            if not change or stop_mask[term_id]:
+                continue
+            # A term cut off at the old end of the text can lose occurrences
+            affected = changed if change > 0 else decreased
+            for sentence_id, frequency in self.index.postings.get(term_id, ()):
+                if sentence_id >= first_sentence_id:
+                    break
+                totals[sentence_id] += frequency * change
+                affected.add(sentence_id)
+        self._add_totals(first_sentence_id)
+
+        sentence_count = self.tokens.sentence_count
+        if any(sentence_id >= first_sentence_id or sentence_id in decreased for sentence_id in self.leaders):
+            # A leader may have dropped or been replaced, so any sentence can take its place
+            self.leaders = self._rank(range(sentence_count))
+        else:
+            # No leader lost score, so sentences outside the leaderboard can
+            # only enter it if their score grew past the weakest leader
+            changed.update(range(first_sentence_id, sentence_count))
+            if len(self.leaders) == self.leader_count:
+                floor = min(self._score(sentence_id) for sentence_id in self.leaders)
+                changed = [sentence_id for sentence_id in changed if self._score(sentence_id) >= floor]
+            self.leaders = self._rank(set(changed).union(self.leaders))
+
+    def scores(self, method: str = 'frequency') -> List[float]:
+        """
+        Score every sentence.
+
+        Args:
+            method: Only 'frequency' is maintained incrementally
+
+        Returns:
+            One score per sentence, in document order
+        """
+        if method != 'frequency':
+            raise ValueError(f"Incremental scoring only supports 'frequency', not {method}")
+        return [self._score(sentence_id) for sentence_id in range(self.tokens.sentence_count)]
+
+    def top_k(self, k: int, method: str = 'frequency') -> List[int]:
+        """
+        Pick the ``k`` best sentences, breaking ties towards earlier sentences.
+
+        Args:
+            k: Number of sentences to pick
+            method: Only 'frequency' is maintained incrementally
+
+        Returns:
+            Sentence ids of the winners in document order
+        """
+        if method != 'frequency':
+            raise ValueError(f"Incremental scoring only supports 'frequency', not {method}")
+        count = self.tokens.sentence_count
+        if k >= count:
+            return list(range(count))
+        if k <= 0:
+            return []
+        if k <= self.leader_count:
+            return sorted(self.leaders[:k])
+        return sorted(heapq.nlargest(k, range(count), key=self._rank_key))
+
+    def _extend_stop_mask(self):
+        terms = self.tokens.terms
+        self.stop_mask.extend(term in self.stop_words for term in terms[len(self.stop_mask):])
+
+    def _add_totals(self, first_sentence_id: int):
+        """Sum the term weights of sentences from ``first_sentence_id`` on."""
+        tokens = self.tokens
+        stop_mask = self.stop_mask
+        term_counts = tokens.term_counts
+        token_ids = tokens.token_ids
+        offsets = tokens.token_offsets
+        for sentence_id in range(first_sentence_id, tokens.sentence_count):
+            self.totals.append(sum(term_counts[term_id] for term_id in token_ids[offsets[sentence_id]:offsets[sentence_id + 1]]
+                                   if not stop_mask[term_id]))
+
+    def _score(self, sentence_id: int) -> float:
+        length = self.index.sentence_lengths[sentence_id]
+        # Normalize by sentence length
+        return self.totals[sentence_id] / length if length else 0
+
+    def _rank_key(self, sentence_id: int):
+        return self._score(sentence_id), -sentence_id
+
+    def _rank(self, sentence_ids) -> List[int]:
+        """Best ``leader_count`` of the given sentences, best first."""
+        return heapq.nlargest(self.leader_count, sentence_ids, key=self._rank_key)
@@ -0,0 +1,174 @@
+import math
+import operator
+from array import array
+from bisect import bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+from collections import Counter
+from tokenizer import TokenizedDocument
+
+
+class Postings:
+    """
+    Sentences containing one term, in sentence order.
+
+    Sentence ids and term frequencies are kept in two parallel arrays
+    instead of a list of tuples, which takes 8 bytes per entry instead of
+    about 70. Iterating yields ``(sentence_id, term_frequency)`` pairs.
+    """
+
+    __slots__ = ('sentence_ids', 'frequencies')
+
+    def __init__(self):
+        self.sentence_ids = array('I')
+        self.frequencies = array('I')
+
+    def append(self, sentence_id: int, frequency: int):
+        self.sentence_ids.append(sentence_id)
+        self.frequencies.append(frequency)
+
+    def pop(self):
+        """Remove the entry of the last sentence."""
+        self.sentence_ids.pop()
+        self.frequencies.pop()
+
+    def __len__(self) -> int:
+        return len(self.sentence_ids)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return zip(self.sentence_ids, self.frequencies)
+
+
+class SentenceIndex:
+    """Inverted index from terms to the sentences that contain them."""
+
+    def __init__(self, tokens: TokenizedDocument, terms: Optional[Iterable[int]] = None):
+        """
+        Build the index in a single pass over the tokenized sentences.
+
+        Args:
+            tokens: Tokenized document
+            terms: Index only these term ids, e.g. to answer a single question
+                about text that is not kept; such an index cannot be extended
+        """
+        self.postings: Dict[int, Postings] = {}  # term id -> sentences containing it
+        self.posting_count = 0  # total (sentence_id, term_frequency) entries
+        self.sentence_lengths = array('I')  # tokens per sentence
+        self.sentence_count = 0
+        self.average_length = 0.0
+        self.partial = terms is not None
+        if self.partial:
+            self._add_terms(tokens, terms)
+        else:
+            self._add_sentences(tokens, 0)
+
+    def extend(self, tokens: TokenizedDocument, first_sentence_id: int, term_ids: Iterable[int]):
+        """
+        Re-index the end of a document after ``TokenizedDocument.extend``.
+
+        Args:
+            tokens: The extended document
+            first_sentence_id: First sentence that is new or was re-tokenized
+            term_ids: Every term whose occurrences changed, including those of retracted sentences
+        """
+        if self.partial:
+            raise ValueError("Cannot extend an index of selected terms")
+        term_ids = list(term_ids)
+        # Postings are in sentence order, so entries of replaced sentences are at the end
+        for term in term_ids:
+            postings = self.postings.get(term, ())
+            while postings and postings.sentence_ids[-1] >= first_sentence_id:
+                postings.pop()
+                self.posting_count -= 1
+        del self.sentence_lengths[first_sentence_id:]
+
+        self._add_sentences(tokens, first_sentence_id)
+        for term in term_ids:
+            if not self.postings.get(term, True):
+                del self.postings[term]
+
+    def _add_sentences(self, tokens: TokenizedDocument, first_sentence_id: int):
+        """Index sentences from ``first_sentence_id`` to the end of the document."""
+        offsets = tokens.token_offsets
+        token_ids = tokens.token_ids
+        postings = self.postings
+        self.sentence_count = tokens.sentence_count
+        self.average_length = len(token_ids) / self.sentence_count if self.sentence_count else 0.0
+
+        for sentence_id in range(first_sentence_id, self.sentence_count):
+            start, end = offsets[sentence_id], offsets[sentence_id + 1]
+            self.sentence_lengths.append(end - start)
+            frequencies = Counter(token_ids[start:end])
+            self.posting_count += len(frequencies)
+            for term, frequency in frequencies.items():
+                term_postings = postings.get(term)
+                if term_postings is None:
+                    term_postings = postings[term] = Postings()
+                term_postings.append(sentence_id, frequency)
+
+    def _add_terms(self, tokens: TokenizedDocument, terms: Iterable[int]):
+        """Index the given terms only, finding their occurrences without counting every sentence."""
+        offsets = tokens.token_offsets
+        token_ids = tokens.token_ids
+        self.sentence_count = tokens.sentence_count
+        self.average_length = len(token_ids) / self.sentence_count if self.sentence_count else 0.0
+        self.sentence_lengths = array('I', map(operator.sub, offsets[1:], offsets[:-1]))
+
+        for term in set(terms):
+            frequencies = Counter()
+            position = -1
+            while True:
+                try:
+                    position = token_ids.index(term, position + 1)
+                except ValueError:
+                    break
+                frequencies[bisect_right(offsets, position) - 1] += 1
+            if frequencies:
+                term_postings = self.postings[term] = Postings()
+                for sentence_id, frequency in frequencies.items():
+                    term_postings.append(sentence_id, frequency)
+                self.posting_count += len(frequencies)
+
+    def candidates(self, terms: Iterable[int]) -> Dict[int, List[int]]:
+        """
+        Find the sentences that contain at least one of the given terms.
+
+        Args:
+            terms: Query term ids
+
+        Returns:
+            Mapping of sentence id to the distinct query term ids it contains
+        """
+        hits: Dict[int, List[int]] = {}
+        for term in set(terms):
+            for sentence_id, _ in self.postings.get(term, ()):
+                hits.setdefault(sentence_id, []).append(term)
+        return hits
+
+    def bm25_scores(self, terms: Iterable[int], k1: float = 1.5, b: float = 0.75) -> Dict[int, float]:
+        """
+        Score candidate sentences with Okapi BM25.
+
+        Args:
+            terms: Query term ids; repeated terms weigh more
+            k1: Term frequency saturation
+            b: Sentence length normalization
+
+        Returns:
+            Mapping of sentence id to BM25 score for sentences sharing a term
+        """
+        scores: Dict[int, float] = {}
+        if not self.sentence_count:
+            return scores
+
+        for term, query_frequency in Counter(terms).items():
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+
+            document_frequency = len(postings)
+            idf = math.log(1 + (self.sentence_count - document_frequency + 0.5) / (document_frequency + 0.5))
+            for sentence_id, frequency in postings:
+                length_norm = 1 - b + b * self.sentence_lengths[sentence_id] / self.average_length
+                weight = idf * frequency * (k1 + 1) / (frequency + k1 * length_norm)
+                scores[sentence_id] = scores.get(sentence_id, 0.0) + query_frequency * weight
+        return scores
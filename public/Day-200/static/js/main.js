@@ -1,6 +1,7 @@
 class DocumentAnalyzer {
     constructor() {
         this.documentText = '';
+        this.documentId = null;
         this.init();
     }
 
@@ -71,6 +72,7 @@ class DocumentAnalyzer {
 
             if (data.success) {
                 this.documentText = data.text;
+                this.documentId = data.document_id || null;
                 this.showDocumentStats(data.stats);
                 this.showMainContent();
                 this.hideError();
@@ -96,19 +98,10 @@ class DocumentAnalyzer {
         this.setSummarizeState(true);
 
         try {
-            const response = await fetch('/summarize', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    text: this.documentText,
-                    length: summaryLength
-                })
+            const data = await this.postWithDocument('/summarize', 'text', {
+                length: summaryLength
             });
 
-            const data = await response.json();
-
             if (data.success) {
                 this.showSummary(data.summary, data.stats);
                 this.hideError();
@@ -140,19 +133,10 @@ class DocumentAnalyzer {
         this.setAskState(true);
 
         try {
-            const response = await fetch('/ask', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({
-                    question: question,
-                    context: this.documentText
-                })
+            const data = await this.postWithDocument('/ask', 'context', {
+                question: question
             });
 
-            const data = await response.json();
-
             if (data.success) {
                 this.addQAItem(question, data.answer);
                 questionInput.value = '';
@@ -169,6 +153,34 @@ class DocumentAnalyzer {
         }
     }
 
+    async postWithDocument(url, textKey, payload) {
+        // Reference the server-side copy of the document when we have one
+        // and only fall back to re-sending the full text if it has expired.
+        if (this.documentId) {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json',
+                },
+                body: JSON.stringify({ ...payload, document_id: this.documentId })
+            });
+
+            if (response.status !== 404) {
+                return response.json();
+            }
+            this.documentId = null;
+        }
+
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ ...payload, [textKey]: this.documentText })
+        });
+        return response.json();
+    }
+
     setUploadState(loading) {
         const uploadBtn = document.getElementById('uploadBtn');
         const uploadSpinner = document.getElementById('uploadSpinner');
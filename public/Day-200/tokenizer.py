@@ -0,0 +1,239 @@
+import re
+from array import array
+from bisect import bisect_right
+from typing import Optional, List, Tuple, Dict
+from collections import Counter
+
+# Patterns are compiled once at import and shared by every document
+WORD_PATTERN = re.compile(r'\w+')
+SENTENCE_BOUNDARY_PATTERN = re.compile(r'[.!?]+')
+
+# Fragments of this many characters or fewer are not treated as sentences
+MIN_SENTENCE_CHARS = 10
+
+
+class TokenizedDocument:
+    """
+    Compact single-pass tokenization of a document.
+
+    Tokens are interned to integer ids. The ids of all kept sentences live in
+    one ``array`` buffer, with offset tables marking where each sentence's
+    tokens and characters start and end. Sentence strings are sliced out of
+    the original text only when they are needed.
+
+    A document can also be built incrementally: create it without text,
+    ``feed`` chunks as they are extracted and call ``finish`` at the end.
+    Statistics for every completed sentence are available while feeding.
+    A finished document can still grow through ``extend``.
+    """
+
+    def __init__(self, text: Optional[str] = None):
+        """
+        Tokenize ``text`` in one pass, or start an empty document to ``feed``.
+
+        Args:
+            text: Full document text; omit it to build the document from chunks
+        """
+        self.text = ''
+        self.vocabulary = {}            # term -> term id
+        self.terms: List[str] = []      # term id -> term
+        self.term_counts = array('I')   # term id -> occurrences across the whole text
+        self.token_ids = array('I')     # token ids of kept sentences, concatenated
+        self.token_offsets = array('I', [0])  # sentence i owns token_ids[token_offsets[i]:token_offsets[i + 1]]
+        self.sentence_starts = array('I')     # character span of each stripped sentence
+        self.sentence_ends = array('I')
+        self.finished = False
+
+        # Streaming state: chunks fed so far and the text after the last
+        # sentence boundary, which may still continue in the next chunk.
+        self._pieces: List[str] = []
+        self._piece_starts: List[int] = []
+        self._length = 0
+        self._pending: List[str] = []
+        self._pending_start = 0
+        self._tail_start = 0  # where the text after the last sentence boundary begins
+        self._delta: Optional[Counter] = None  # token ids added while extending
+
+        if text is not None:
+            self.text = text
+            self._tokenize(text, 0, final=True)
+            self.finished = True
+
+    def feed(self, chunk: str) -> 'TokenizedDocument':
+        """
+        Tokenize the next chunk of a streamed document.
+
+        Args:
+            chunk: Text that directly follows everything fed so far
+
+        Returns:
+            The document itself
+        """
+        if self.finished:
+            raise ValueError("Cannot feed a finished document")
+        if not chunk:
+            return self
+
+        self._pieces.append(chunk)
+        self._piece_starts.append(self._length)
+        self._length += len(chunk)
+
+        if not SENTENCE_BOUNDARY_PATTERN.search(chunk):
+            # Still inside the same sentence; avoid re-joining the buffer
+            self._pending.append(chunk)
+            return self
+
+        buffer = "".join(self._pending) + chunk
+        remainder = self._tokenize(buffer, self._pending_start, final=False)
+        self._pending = [remainder] if remainder else []
+        self._pending_start = self._length - len(remainder)
+        return self
+
+    def finish(self) -> 'TokenizedDocument':
+        """Tokenize the trailing text of a streamed document and join its text."""
+        if self.finished:
+            return self
+
+        self._tokenize("".join(self._pending), self._pending_start, final=True)
+        self.text = "".join(self._pieces)
+        self._pieces, self._piece_starts, self._pending = [], [], []
+        self.finished = True
+        return self
+
+    def extend(self, chunk: str) -> Tuple[int, Dict[int, int]]:
+        """
+        Append text to a finished document.
+
+        The text after the last sentence boundary was tokenized as a final
+        fragment, but the appended text may continue it. That fragment is
+        retracted and tokenized again together with ``chunk``; everything
+        before it is left untouched.
+
+        Args:
+            chunk: Text that directly follows the current text
+
+        Returns:
+            Tuple of (id of the first new or re-tokenized sentence, term id ->
+            change in occurrences for every term in the re-tokenized text)
+        """
+        if not self.finished:
+            raise ValueError("Only finished documents can be extended")
+
+        tail_start = self._tail_start
+        tail = self.text[tail_start:]
+        removed = Counter(WORD_PATTERN.findall(tail.lower()))
+        for token, count in removed.items():
+            self.term_counts[self.vocabulary[token]] -= count
+        if len(tail.strip()) > MIN_SENTENCE_CHARS:
+            # The trailing fragment was kept as the last sentence
+            self.sentence_starts.pop()
+            self.sentence_ends.pop()
+            self.token_offsets.pop()
+            del self.token_ids[self.token_offsets[-1]:]
+        first_sentence_id = self.sentence_count
+
+        self.text += chunk
+        self._delta = Counter()
+        try:
+            self._tokenize(tail + chunk, tail_start, final=True)
+            changes = dict(self._delta)
+        finally:
+            self._delta = None
+
+        for token, count in removed.items():
+            term_id = self.vocabulary[token]
+            changes[term_id] = changes.get(term_id, 0) - count
+        return first_sentence_id, changes
+
+    def _tokenize(self, buffer: str, offset: int, final: bool) -> str:
+        """
+        Tokenize every complete sentence fragment in ``buffer``.
+
+        Args:
+            buffer: Text to split on sentence boundaries
+            offset: Position of ``buffer`` within the document
+            final: Also tokenize the text after the last boundary
+
+        Returns:
+            The unprocessed text after the last boundary ('' when final)
+        """
+        position = 0
+        for boundary in SENTENCE_BOUNDARY_PATTERN.finditer(buffer):
+            self._add_fragment(buffer[position:boundary.start()], offset + position)
+            position = boundary.end()
+
+        if final:
+            self._tail_start = offset + position
+            self._add_fragment(buffer[position:], offset + position)
+            return ''
+        return buffer[position:]
+
+    def _add_fragment(self, fragment: str, start: int):
+        """Tokenize the text between two sentence boundaries."""
+        tokens = WORD_PATTERN.findall(fragment.lower())
+        if not tokens and not fragment.strip():
+            return
+
+        vocabulary = self.vocabulary
+        terms = self.terms
+        term_counts = self.term_counts
+        ids = []
+        for token in tokens:
+            term_id = vocabulary.get(token)
+            if term_id is None:
+                term_id = len(terms)
+                vocabulary[token] = term_id
+                terms.append(token)
+                term_counts.append(0)
+            term_counts[term_id] += 1
+            ids.append(term_id)
+        if self._delta is not None:
+            self._delta.update(ids)
+
+        stripped = fragment.strip()
+        if len(stripped) > MIN_SENTENCE_CHARS:
+            sentence_start = start + len(fragment) - len(fragment.lstrip())
+            self.sentence_starts.append(sentence_start)
+            self.sentence_ends.append(sentence_start + len(stripped))
+            self.token_ids.extend(ids)
+            self.token_offsets.append(len(self.token_ids))
+
+    def _slice(self, start: int, end: int) -> str:
+        """Return text[start:end], reading from the fed chunks while streaming."""
+        if self.finished:
+            return self.text[start:end]
+
+        index = bisect_right(self._piece_starts, start) - 1
+        parts = []
+        while start < end:
+            piece_start = self._piece_starts[index]
+            piece = self._pieces[index]
+            parts.append(piece[start - piece_start:end - piece_start])
+            start = piece_start + len(piece)
+            index += 1
+        return "".join(parts)
+
+    @property
+    def sentence_count(self) -> int:
+        """Number of kept sentences."""
+        return len(self.sentence_starts)
+
+    def sentence(self, sentence_id: int) -> str:
+        """Materialize one sentence from the backing text."""
+        return self._slice(self.sentence_starts[sentence_id], self.sentence_ends[sentence_id])
+
+    def sentences(self) -> List[str]:
+        """Materialize all kept sentences in document order."""
+        return [self.sentence(i) for i in range(self.sentence_count)]
+
+    def sentence_token_ids(self, sentence_id: int) -> array:
+        """Token ids of one sentence."""
+        return self.token_ids[self.token_offsets[sentence_id]:self.token_offsets[sentence_id + 1]]
+
+    def sentence_token_range(self, sentence_id: int) -> Tuple[int, int]:
+        """Start and end offsets of one sentence within ``token_ids``."""
+        return self.token_offsets[sentence_id], self.token_offsets[sentence_id + 1]
+
+    def term_id(self, term: str) -> Optional[int]:
+        """Look up the id of a term, or None if it never occurs."""
+        return self.vocabulary.get(term)